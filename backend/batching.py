@@ -0,0 +1,85 @@
+"""Micro-batching of concurrent calls.
+
+Callers submit one item each and await its result. Items are collected
+until `max_size` are waiting or `max_wait` seconds have passed since the
+first one, then the whole batch goes to the handler in a single call and
+each caller gets its own result back.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+
+class MicroBatcher:
+    def __init__(self, handler: Callable[[Sequence[Any]], Awaitable[List[Any]]],
+                 max_size: int = 16, max_wait: float = 0.005):
+        """`handler` takes a list of items and returns one result per item, in order.
+
+        A result that is an exception is raised to that item's caller only.
+        """
+        self.handler = handler
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            results = [e] * len(batch)
+        except BaseException as e:
+            # Cancelled, e.g. at shutdown: don't leave the callers waiting
+            self._resolve(batch, [e] * len(batch))
+            raise
+        self._resolve(batch, results)
+
+    @staticmethod
+    def _resolve(batch: list, results: list):
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled meanwhile
+            if future.done():
+                continue
+            # gather(return_exceptions=True) also returns CancelledError, a BaseException
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "waiting": len(self._pending),
+            "in_flight": len(self._tasks),
+            "largest_batch": self.largest_batch,
+            "average_batch": self.items / self.batches if self.batches else 0.0,
+        }
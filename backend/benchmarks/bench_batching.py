@@ -0,0 +1,109 @@
+"""Throughput of outcome classification with and without micro-batching.
+
+Fires concurrent classify() calls on distinct notes (so every call misses
+the LLM cache) at the stub LLM, once per batch size. The stub charges a
+fixed per-request latency plus a small cost per classified note, roughly
+how a hosted model behaves, and the LLM client keeps its concurrency cap.
+Batch size 1 is the unbatched path. Labels are checked against the
+unbatched stub answers.
+
+Usage:
+    python benchmarks/bench_batching.py [--requests 2000] [--concurrency 200]
+        [--batch-sizes 1,8,16,32] [--wait-ms 5] [--latency-ms 100] [--per-item-ms 2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import enrichment  # noqa: E402
+from llm import StubBackend, init_llm, stub_responder  # noqa: E402
+from llm_cache import init_cache  # noqa: E402
+
+PHRASES = [
+    "discussed product z pricing and dosing",
+    "dr. smith declined the trial offer",
+    "asked us to schedule a follow-up next month",
+    "positive feedback on efficacy data",
+    "not interested in switching patients",
+    "requested we send the new brochure",
+]
+
+
+class BatchCostBackend(StubBackend):
+    """Stub whose latency grows with the number of notes in a batched prompt."""
+
+    def __init__(self, latency: float, per_item: float):
+        super().__init__(latency)
+        self.per_item = per_item
+
+    async def complete(self, prompt: str, model: str, **kwargs) -> str:
+        items = len(re.findall(r"^\d+\. ", prompt, re.MULTILINE)) or 1
+        await asyncio.sleep(self.per_item * items)
+        return await super().complete(prompt, model, **kwargs)
+
+
+def make_notes(count: int, run: int) -> list:
+    rng = random.Random(run)
+    return [f"{rng.choice(PHRASES)} (visit {run}-{i})" for i in range(count)]
+
+
+async def run(batch_size: int, args) -> dict:
+    os.environ["CLASSIFY_BATCH_SIZE"] = str(batch_size)
+    os.environ["CLASSIFY_BATCH_WAIT_MS"] = str(args.wait_ms)
+    enrichment.classify_batcher = None
+    backend = BatchCostBackend(args.latency_ms / 1000, args.per_item_ms / 1000)
+    init_llm(backend)
+    init_cache()
+    notes = make_notes(args.requests, batch_size)
+    expected = [stub_responder("Classify. Notes:" + item) for item in notes]
+    queue = list(enumerate(notes))
+    labels = [None] * len(notes)
+    latencies = []
+
+    async def worker():
+        while queue:
+            i, item = queue.pop()
+            begin = time.perf_counter()
+            labels[i] = await enrichment.classify(item)
+            latencies.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - begin
+    latencies.sort()
+    return {
+        "rps": len(notes) / elapsed,
+        "llm_calls": backend.calls,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "mismatches": sum(label != answer for label, answer in zip(labels, expected)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--batch-sizes", default="1,8,16,32")
+    parser.add_argument("--wait-ms", type=float, default=5)
+    parser.add_argument("--latency-ms", type=float, default=100, help="stub latency per LLM request")
+    parser.add_argument("--per-item-ms", type=float, default=2, help="extra stub latency per classified note")
+    args = parser.parse_args()
+
+    print(f"{args.requests} classifications, {args.concurrency} concurrent callers, "
+          f"LLM_MAX_CONCURRENCY={os.getenv('LLM_MAX_CONCURRENCY', '8')}")
+    print(f"{'batch size':>10} {'req/s':>9} {'LLM calls':>10} {'p50 ms':>9} {'p95 ms':>9} {'mismatches':>11}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        result = asyncio.run(run(batch_size, args))
+        print(f"{batch_size:>10} {result['rps']:>9.1f} {result['llm_calls']:>10} {result['p50_ms']:>9.1f} "
+              f"{result['p95_ms']:>9.1f} {result['mismatches']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Near-duplicate detection: accuracy per similarity threshold, lookup latency and memory.
+
+Accuracy: each synthetic note is paired with a lightly edited copy (case
+and punctuation, a dropped, replaced or added word, two swapped words),
+which should be flagged, and with a different note about the same HCP on
+the same day, which should not. Reports recall and false positive rate
+for several --thresholds.
+
+Scale: fills one index with --entries interactions spread over --hcps
+HCPs and times find() for new notes, plus the RSS growth of the index.
+
+Usage:
+    python benchmarks/bench_dedup.py [--pairs 2000] [--thresholds 0.5,0.6,0.7]
+        [--entries 100000] [--hcps 2000] [--lookups 5000]
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import DuplicateIndex  # noqa: E402
+
+SUBJECTS = ["product z", "cardiox", "the phase 3 trial", "formulary access", "the new inhaler", "dosing in renal patients",
+            "adherence support", "side effects", "pricing", "the patient assistance program", "competitor data"]
+VERBS = ["discussed", "reviewed", "presented", "went over", "answered questions on", "compared"]
+EXTRAS = ["shared the brochure", "left samples", "doctor was positive", "asked for more data", "will follow up next week",
+          "nurse joined the call", "short meeting", "interested in starting two patients", "concerned about cost"]
+
+
+def make_note(rng: random.Random) -> str:
+    parts = [f"{rng.choice(VERBS)} {rng.choice(SUBJECTS)}"
+             + (f" and {rng.choice(SUBJECTS)}" if rng.random() < 0.6 else "")]
+    parts += rng.sample(EXTRAS, rng.randint(1, 3))
+    return ", ".join(parts)
+
+
+def edit(note: str, rng: random.Random) -> str:
+    words = note.split()
+    kind = rng.randrange(5)
+    if kind == 0:
+        return note.upper().replace(",", ";") + "."
+    if kind == 1 and len(words) > 4:
+        del words[rng.randrange(len(words))]
+    elif kind == 2:
+        words[rng.randrange(len(words))] = rng.choice(["very", "today", "also", "briefly"])
+    elif kind == 3:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(["again", "quickly", "dr.", "team"]))
+    else:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    return " ".join(words)
+
+
+def accuracy(threshold: float, pairs: int) -> tuple:
+    rng = random.Random(1)
+    found = false_positives = 0
+    for i in range(pairs):
+        index = DuplicateIndex(threshold=threshold)
+        note = make_note(rng)
+        other = make_note(rng)
+        while other == note:
+            other = make_note(rng)
+        index.add(1, "hcp", "2025-06-05", note)
+        found += index.find("hcp", "2025-06-05", edit(note, rng)) == 1
+        false_positives += index.find("hcp", "2025-06-05", other) == 1
+    return found / pairs, false_positives / pairs
+
+
+def scale(args) -> dict:
+    rng = random.Random(2)
+    days = [f"2025-06-{day:02}" for day in range(1, 31)]
+    hcp_ids = [f"hcp-{i}" for i in range(args.hcps)]
+    notes = [make_note(rng) for _ in range(args.entries)]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    index = DuplicateIndex(max_entries=args.entries, max_per_hcp=args.entries // args.hcps + 1)
+    begin = time.perf_counter()
+    for i, note in enumerate(notes, 1):
+        index.add(i, rng.choice(hcp_ids), rng.choice(days), note)
+    add_rate = args.entries / (time.perf_counter() - begin)
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+
+    latencies = []
+    for _ in range(args.lookups):
+        hcp_id, day, note = rng.choice(hcp_ids), rng.choice(days), make_note(rng)
+        begin = time.perf_counter()
+        index.find(hcp_id, day, note)
+        latencies.append((time.perf_counter() - begin) * 1e6)
+    latencies.sort()
+    return {"add_rate": add_rate, "rss_growth": rss_growth, "p50_us": latencies[len(latencies) // 2],
+            "p99_us": latencies[int(len(latencies) * 0.99) - 1], "entries": index.stats()["entries"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--thresholds", default="0.5,0.6,0.7")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--hcps", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'threshold':>9} {'recall':>8} {'false pos':>10}")
+    for threshold in (float(value) for value in args.thresholds.split(",")):
+        recall, false_positive_rate = accuracy(threshold, args.pairs)
+        print(f"{threshold:>9.2f} {recall:>8.1%} {false_positive_rate:>10.1%}")
+
+    result = scale(args)
+    print(f"\n{result['entries']:,} indexed interactions over {args.hcps:,} HCPs: "
+          f"{result['add_rate']:,.0f} adds/s, ~{result['rss_growth']:.0f} MB RSS growth")
+    print(f"find() incl. signature: p50 {result['p50_us']:.1f}us, p99 {result['p99_us']:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Accuracy and throughput benchmark for extraction.parse_message.
+
+Usage:
+    python benchmarks/bench_extraction.py [--iterations N] [--file notes.txt]
+
+The built-in corpus checks field accuracy; --file parses one message per
+line (e.g. bulk-imported call notes) and reports throughput only.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import parse_message  # noqa: E402
+
+# (message, expected fields); messages are lowercased like the /chat workflow does
+CORPUS = [
+    ("met dr.davis, discussed product z pricing, positive sentiment, shared brochure",
+     {"hcp_name": "davis", "topic_discussed": "product z pricing", "hcp_sentiment": "positive",
+      "materials_shared": "brochure", "interaction_type": None}),
+    ("fill form met dr. smith on a call 2025-06-05 09:30 discussed metformin dosing neutral sentiment",
+     {"hcp_name": "smith", "interaction_type": "call", "date": "2025-06-05", "time": "09:30:00",
+      "topic_discussed": "metformin dosing", "hcp_sentiment": "neutral"}),
+    ("met dr.patel attendees: anna, bob discussed trial enrollment outcomes: agreed to enroll follow-up: send consent forms",
+     {"hcp_name": "patel", "attendees": "anna, bob", "topic_discussed": "trial enrollment",
+      "outcomes": "agreed to enroll", "follow_up_action": "send consent forms"}),
+    ("retrieve dr.davis hcp sentiment to positive",
+     {"is_fetch_command": True, "command": "retrieve", "hcp_name": "davis",
+      "update_field": "hcp_sentiment", "update_value": "positive", "hcp_sentiment": None}),
+    ("update dr.lee topic to new dosing guidelines",
+     {"command": "update", "hcp_name": "lee", "update_field": "topic_discussed",
+      "update_value": "new dosing guidelines"}),
+    ("fetch dr.kim follow-up action to schedule lunch and learn",
+     {"command": "fetch", "hcp_name": "kim", "update_field": "follow_up_action", "update_value": "schedule lunch"}),
+    ("replace dr.ng date to 2025-07-01",
+     {"command": "replace", "hcp_name": "ng", "update_field": "date", "update_value": "2025-07-01"}),
+    ("fill form hcp 42 specialty: cardiology email topic: new trial data",
+     {"hcp_id": "42", "specialty": "cardiology", "interaction_type": "email", "topic_discussed": "new trial data"}),
+    ("met dr.garcia today, discussed side effects and shared samples, negative sentiment",
+     {"hcp_name": "garcia", "topic_discussed": "side effects", "materials_shared": "samples",
+      "hcp_sentiment": "negative"}),
+    ("met dr.brown at 14:05:30 discussed moving the meeting to june",
+     {"hcp_name": "brown", "time": "14:05:30", "topic_discussed": "moving the meeting to june",
+      "update_field": None}),
+    ("save", {"is_fetch_command": False, "hcp_name": None, "interaction_type": None}),
+    ("met dr.wong attendance at conference, material: slide deck, outcomes: interested in samples",
+     {"hcp_name": "wong", "interaction_type": "attendance", "materials_shared": "slide deck",
+      "outcomes": "interested in samples"}),
+]
+
+
+def accuracy():
+    correct = total = 0
+    failures = []
+    for message, expected in CORPUS:
+        entities = parse_message(message)
+        for field, value in expected.items():
+            total += 1
+            if entities.get(field) == value:
+                correct += 1
+            else:
+                failures.append((message, field, value, entities.get(field)))
+    return correct, total, failures
+
+
+def throughput(messages, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            parse_message(message)
+    elapsed = time.perf_counter() - start
+    return iterations * len(messages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--file", help="one message per line to parse instead of the built-in corpus")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            messages = [line.strip().lower() for line in f if line.strip()]
+        print(f"messages/sec: {throughput(messages, 1):,.0f} over {len(messages)} messages")
+        return
+
+    correct, total, failures = accuracy()
+    print(f"field accuracy: {correct}/{total} ({correct / total:.1%})")
+    for message, field, wanted, got in failures:
+        print(f"  MISS {field!r}: wanted {wanted!r}, got {got!r} in {message!r}")
+    messages = [message for message, _ in CORPUS]
+    print(f"messages/sec: {throughput(messages, args.iterations):,.0f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Query latency before and after the secondary-index migration.
+
+Seeds a scratch database with synthetic interactions and profiles, times
+the fetch_latest_interaction and name-lookup queries on the base schema
+(migration 1), applies migration 2 and times them again.
+
+Usage:
+    python benchmarks/bench_indexes.py [--rows 2000000] [--hcps 50000] [--queries 200]
+
+Connection settings come from DB_HOST, DB_PORT, DB_USER and DB_PASSWORD;
+the scratch database (--database, default hcp_bench) is dropped first.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+import aiomysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate  # noqa: E402
+
+LATEST_QUERY = """
+    SELECT id, hcp_id, interaction_type, date, time, attendees, topic_discussed,
+           materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome
+    FROM hcp_interactions
+    WHERE hcp_id = %s
+    ORDER BY date DESC, time DESC
+    LIMIT 1
+"""
+NAME_QUERY = "SELECT hcp_id, name, specialty FROM hcp_profiles WHERE name = %s"
+
+
+async def seed(pool, rows: int, hcps: int, chunk: int = 10000):
+    profiles = [(str(uuid.uuid4()), f"hcp {i}", random.choice(("cardiology", "oncology", "neurology")))
+                for i in range(hcps)]
+    start = date(2020, 1, 1)
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            for i in range(0, hcps, chunk):
+                await cursor.executemany(
+                    "INSERT INTO hcp_profiles (hcp_id, name, specialty) VALUES (%s, %s, %s)",
+                    profiles[i:i + chunk]
+                )
+            for i in range(0, rows, chunk):
+                batch = [
+                    (random.choice(profiles)[0], "meeting", start + timedelta(days=random.randrange(2000)),
+                     timedelta(seconds=random.randrange(86400)), "discussed product pricing", "neutral")
+                    for _ in range(min(chunk, rows - i))
+                ]
+                await cursor.executemany(
+                    "INSERT INTO hcp_interactions (hcp_id, interaction_type, date, time, topic_discussed, hcp_sentiment)"
+                    " VALUES (%s, %s, %s, %s, %s, %s)",
+                    batch
+                )
+                await conn.commit()
+                print(f"\rseeded {i + len(batch):,}/{rows:,} interactions", end="", flush=True)
+    print()
+    return profiles
+
+
+async def time_query(pool, sql: str, params: list) -> dict:
+    latencies = []
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            for param in params:
+                begin = time.perf_counter()
+                await cursor.execute(sql, (param,))
+                await cursor.fetchall()
+                latencies.append((time.perf_counter() - begin) * 1000)
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "max_ms": latencies[-1],
+    }
+
+
+async def run(args):
+    settings = dict(
+        host=os.getenv("DB_HOST", "localhost"), port=int(os.getenv("DB_PORT", "3306")),
+        user=os.getenv("DB_USER", "root"), password=os.getenv("DB_PASSWORD", ""), autocommit=True,
+    )
+    conn = await aiomysql.connect(**settings)
+    async with conn.cursor() as cursor:
+        await cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        await cursor.execute(f"CREATE DATABASE `{args.database}`")
+    conn.close()
+
+    pool = await aiomysql.create_pool(db=args.database, minsize=1, maxsize=2, **settings)
+    try:
+        await migrate(pool, target=1)
+        profiles = await seed(pool, args.rows, args.hcps)
+        sample = random.sample(profiles, min(args.queries, len(profiles)))
+        ids = [p[0] for p in sample]
+        names = [p[1] for p in sample]
+
+        results = {}
+        for phase in ("before", "after"):
+            if phase == "after":
+                begin = time.perf_counter()
+                await migrate(pool)
+                print(f"migration 2 applied in {time.perf_counter() - begin:.1f}s")
+            results[phase] = {
+                "fetch_latest_interaction": await time_query(pool, LATEST_QUERY, ids),
+                "profile by name": await time_query(pool, NAME_QUERY, names),
+            }
+
+        print(f"\n{args.rows:,} interactions, {args.hcps:,} HCPs, {len(sample)} queries each")
+        for query in results["before"]:
+            before, after = results["before"][query], results["after"][query]
+            print(f"{query:26} p50 {before['p50_ms']:9.2f}ms -> {after['p50_ms']:7.2f}ms   "
+                  f"p95 {before['p95_ms']:9.2f}ms -> {after['p95_ms']:7.2f}ms")
+    finally:
+        pool.close()
+        await pool.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--hcps", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--database", default="hcp_bench")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
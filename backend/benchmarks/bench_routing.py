@@ -0,0 +1,92 @@
+"""Routing cost per chat message: substring checks versus the intent router.
+
+The previous workflow parsed every message fully and then matched
+substrings ("met" in message, ...); the router matches one compiled
+alternation of whole-word keywords. Also times a full graph run for
+messages that need no tools (route + unknown node), i.e. the LangGraph
+overhead per message.
+
+Usage:
+    python benchmarks/bench_routing.py [--iterations 20000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction import detect_intent, parse_message  # noqa: E402
+
+# (message, expected intent)
+CORPUS = [
+    ("met dr.davis, discussed product z pricing, positive sentiment, shared brochure", "fill"),
+    ("fill form hcp 42 specialty: cardiology email topic: new trial data", "fill"),
+    ("retrieve dr.davis hcp sentiment to positive", "fetch"),
+    ("update dr.lee topic to new dosing guidelines", "fetch"),
+    ("save", "save"),
+    ("please log interaction now", "save"),
+    ("edit interaction with the new attendees", "edit"),
+    ("delete interaction", "delete"),
+    ("summarize the notes", "summarize"),
+    ("discussed metformin dosing with the team", "unknown"),
+    ("what does the metric say about the comet trial", "unknown"),
+    ("hello there", "unknown"),
+]
+
+
+def substring_route(text: str) -> str:
+    """Routing as done by the former single process_interaction node."""
+    message = text.lower()
+    entities = parse_message(message)
+    if entities.get("is_fetch_command"):
+        return "fetch"
+    if "fill form" in message or "met" in message:
+        return "fill"
+    if "log interaction" in message or "save" in message:
+        return "save"
+    if "edit interaction" in message:
+        return "edit"
+    if "delete interaction" in message:
+        return "delete"
+    return "unknown"
+
+
+def time_router(router, iterations: int) -> float:
+    messages = [message for message, _ in CORPUS]
+    begin = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            router(message)
+    return (time.perf_counter() - begin) / (iterations * len(messages)) * 1e6
+
+
+async def time_graph(iterations: int) -> float:
+    from main import InteractionState, create_workflow
+    graph = create_workflow()
+    messages = [message for message, intent in CORPUS if intent == "unknown"]
+    begin = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            await graph.ainvoke(InteractionState(messages=[{"role": "user", "content": message}]))
+    return (time.perf_counter() - begin) / (iterations * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    for name, router in (("substring checks", substring_route), ("intent router", detect_intent)):
+        wrong = [(message, router(message), intent) for message, intent in CORPUS if router(message) != intent]
+        print(f"{name:18} {time_router(router, args.iterations):8.2f} us/message  "
+              f"{len(CORPUS) - len(wrong)}/{len(CORPUS)} routed correctly")
+        for message, got, expected in wrong:
+            print(f"    {message!r}: {got} (expected {expected})")
+    graph_iterations = max(1, args.iterations // 20)
+    print(f"{'graph, no tools':18} {asyncio.run(time_graph(graph_iterations)):8.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
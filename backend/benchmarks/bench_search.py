@@ -0,0 +1,172 @@
+"""Full-text search latency: in-process inverted index versus MySQL FULLTEXT.
+
+Generates synthetic interaction notes (Zipf-distributed vocabulary), builds
+the in-process index from them and times queries on common, mid-frequency
+and rare terms, two-term queries and queries filtered by HCP. With --mysql
+the same rows are seeded into a scratch database, migration 4 (the
+FULLTEXT index) is applied and the same queries are timed against MySQL.
+
+Usage:
+    python benchmarks/bench_search.py [--rows 1000000] [--hcps 50000] [--queries 50] [--mysql]
+
+Connection settings for --mysql come from DB_HOST, DB_PORT, DB_USER and
+DB_PASSWORD; the scratch database (--database, default hcp_bench_search)
+is dropped first.
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import uuid
+from itertools import accumulate
+
+import aiomysql
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate  # noqa: E402
+from search import InvertedIndex, fulltext_search  # noqa: E402
+
+VOCABULARY = 20000
+COLUMNS = ("id", "hcp_id", "topic_discussed", "summary", "outcomes")
+
+
+def make_words(count: int) -> list:
+    # Pronounceable pseudo-words, all longer than InnoDB's minimum token size
+    syllables = ["ka", "lo", "mi", "ne", "ro", "ta", "vi", "su", "de", "po", "ri", "xa"]
+    rng = random.Random(0)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def make_rows(count: int, hcps: int, words: list, seed: int = 1):
+    rng = random.Random(seed)
+    cumulative = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    hcp_ids = [str(uuid.uuid4()) for _ in range(hcps)]
+    for i in range(1, count + 1):
+        notes = " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(15, 40)))
+        summary = " ".join(rng.choices(words, cum_weights=cumulative, k=rng.randint(5, 12)))
+        yield i, rng.choice(hcp_ids), notes, summary, "agreed to review " + words[rng.randrange(100)]
+
+
+def make_queries(words: list, rows: list, count: int) -> dict:
+    rng = random.Random(2)
+    return {
+        "common term": [words[rng.randrange(0, 20)] for _ in range(count)],
+        "mid term": [words[rng.randrange(200, 1000)] for _ in range(count)],
+        "rare term": [words[rng.randrange(5000, len(words))] for _ in range(count)],
+        "two terms": [f"{words[rng.randrange(20, 500)]} {words[rng.randrange(500, 5000)]}" for _ in range(count)],
+        "common term, one HCP": [(words[rng.randrange(0, 20)], rng.choice(rows)[1]) for _ in range(count)],
+    }
+
+
+def summarize(latencies: list) -> dict:
+    latencies.sort()
+    return {"p50_ms": statistics.median(latencies), "p95_ms": latencies[int(len(latencies) * 0.95) - 1]}
+
+
+def time_index(index: InvertedIndex, queries: dict) -> dict:
+    results = {}
+    for name, params in queries.items():
+        latencies = []
+        for param in params:
+            query, hcp_id = param if isinstance(param, tuple) else (param, None)
+            begin = time.perf_counter()
+            index.search(query, 20, 0, hcp_id)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        results[name] = summarize(latencies)
+    return results
+
+
+async def time_mysql(pool, queries: dict) -> dict:
+    results = {}
+    for name, params in queries.items():
+        latencies = []
+        for param in params:
+            query, hcp_id = param if isinstance(param, tuple) else (param, None)
+            begin = time.perf_counter()
+            await fulltext_search(pool, COLUMNS, query, 20, 0, hcp_id)
+            latencies.append((time.perf_counter() - begin) * 1000)
+        results[name] = summarize(latencies)
+    return results
+
+
+async def run_mysql(args, rows: list, queries: dict) -> dict:
+    settings = dict(
+        host=os.getenv("DB_HOST", "localhost"), port=int(os.getenv("DB_PORT", "3306")),
+        user=os.getenv("DB_USER", "root"), password=os.getenv("DB_PASSWORD", ""), autocommit=True,
+    )
+    conn = await aiomysql.connect(**settings)
+    async with conn.cursor() as cursor:
+        await cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        await cursor.execute(f"CREATE DATABASE `{args.database}`")
+    conn.close()
+
+    pool = await aiomysql.create_pool(db=args.database, minsize=1, maxsize=2, **settings)
+    try:
+        await migrate(pool, target=3)
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                for i in range(0, len(rows), 10000):
+                    await cursor.executemany(
+                        "INSERT INTO hcp_interactions (id, hcp_id, topic_discussed, summary, outcomes)"
+                        " VALUES (%s, %s, %s, %s, %s)",
+                        rows[i:i + 10000]
+                    )
+                    print(f"\rseeded {min(i + 10000, len(rows)):,}/{len(rows):,} interactions", end="", flush=True)
+        print()
+        begin = time.perf_counter()
+        await migrate(pool)
+        print(f"FULLTEXT index built in {time.perf_counter() - begin:.1f}s")
+        return await time_mysql(pool, queries)
+    finally:
+        pool.close()
+        await pool.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--hcps", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--mysql", action="store_true", help="also time MySQL FULLTEXT queries")
+    parser.add_argument("--database", default="hcp_bench_search")
+    args = parser.parse_args()
+
+    words = make_words(VOCABULARY)
+    begin = time.perf_counter()
+    rows = list(make_rows(args.rows, args.hcps, words))
+    print(f"generated {len(rows):,} rows in {time.perf_counter() - begin:.1f}s")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    index = InvertedIndex()
+    begin = time.perf_counter()
+    for interaction_id, hcp_id, notes, summary, outcomes in rows:
+        index.add(interaction_id, hcp_id, f"{notes} {summary} {outcomes}")
+    elapsed = time.perf_counter() - begin
+    rss_growth = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    stats = index.stats()
+    print(f"in-process index: {len(rows) / elapsed:,.0f} docs/s, {stats['terms']:,} terms, "
+          f"{stats['postings']:,} postings, ~{rss_growth:,.0f} MB RSS growth")
+
+    queries = make_queries(words, rows, args.queries)
+    results = {"memory": time_index(index, queries)}
+    if args.mysql:
+        results["mysql"] = asyncio.run(run_mysql(args, rows, queries))
+
+    print(f"\n{args.rows:,} interactions, {args.queries} queries each, top 20")
+    print(f"{'query':22} " + " ".join(f"{source + ' p50':>12} {source + ' p95':>12}" for source in results))
+    for name in queries:
+        print(f"{name:22} " + " ".join(
+            f"{results[source][name]['p50_ms']:10.2f}ms {results[source][name]['p95_ms']:10.2f}ms" for source in results
+        ))
+
+
+if __name__ == "__main__":
+    main()
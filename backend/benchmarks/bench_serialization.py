@@ -0,0 +1,86 @@
+"""Rows/sec and peak memory of GET /interactions response serialization.
+
+Compares, on synthetic database rows, the previous path (dict -> Interaction
+model -> response_model validation -> jsonable_encoder -> json) with the
+direct path (row converter -> FastJSONResponse).
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import INTERACTION_COLUMNS, Interaction  # noqa: E402
+from serialization import FORMATTERS, FastJSONResponse, orjson, row_converter  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    start = date(2020, 1, 1)
+    return [
+        (i, "6f1c2d4e-0000-4000-8000-%012d" % (i % 5000), "meeting", start + timedelta(days=i % 2000),
+         timedelta(seconds=i % 86400), "dr. smith, rep", "discussed product z pricing and dosing",
+         "brochure", "positive", "agreed to trial", "send samples", "Discussed product Z pricing.", "positive")
+        for i in range(count)
+    ]
+
+
+def model_path(rows: list) -> bytes:
+    adapter = TypeAdapter(List[Interaction])
+    items = []
+    for row in rows:
+        values = dict(zip(INTERACTION_COLUMNS, row))
+        for column, formatter in FORMATTERS.items():
+            if column in values:
+                values[column] = formatter(values[column])
+        items.append(Interaction(**values))
+    validated = adapter.validate_python(items, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated, exclude_unset=True)).body
+
+
+def direct_path(rows: list) -> bytes:
+    convert = row_converter(INTERACTION_COLUMNS)
+    return FastJSONResponse([convert(row) for row in rows]).body
+
+
+def measure(path, rows: list, repeat: int) -> dict:
+    best = min(timed(path, rows) for _ in range(repeat))
+    tracemalloc.start()
+    body = path(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows_per_sec": len(rows) / best, "peak_mb": peak / 2**20, "bytes": len(body)}
+
+
+def timed(path, rows: list) -> float:
+    begin = time.perf_counter()
+    path(rows)
+    return time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows:,} rows, encoder: {'orjson' if orjson else 'json'}")
+    for name, path in (("model + response_model", model_path), ("row converter", direct_path)):
+        result = measure(path, rows, args.repeat)
+        print(f"{name:24} {result['rows_per_sec']:>11,.0f} rows/s  peak {result['peak_mb']:7.1f} MB  "
+              f"body {result['bytes'] / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Agreement, coverage and latency of the local outcome classifier.
+
+Trains the hashed n-gram model on part of a labelled corpus and, for each
+confidence threshold, reports how many notes the local tiers answer (LLM
+calls avoided) and how often those answers agree with the LLM label on the
+held-out notes. Also checks that the rules don't call negated phrasings
+("not keen on", "isn't interested in") interested, and times the rules
+and the model per call.
+
+Labels come from an NDJSON export (--file, from GET /interactions/export),
+i.e. outcomes the production LLM assigned. Without --file a synthetic
+corpus is labelled by the stub LLM, which only exercises the pipeline: the
+stub applies the same keyword rules as classify_rules, so its figures are
+reported as "stub self-consistency", not agreement, and say nothing about
+how often the local tiers match a real LLM.
+
+Usage:
+    python benchmarks/eval_outcome_classifier.py [--file interactions.ndjson] [--notes 5000]
+        [--thresholds 0.6,0.7,0.8,0.9,0.95] [--save outcome_model.npz]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import stub_responder  # noqa: E402
+from outcome_model import OutcomeModel, classify_rules, load_examples  # noqa: E402
+
+OPENINGS = ["met dr. {name}", "call with dr. {name}", "lunch meeting with the {team} team", "visited the clinic"]
+TOPICS = ["product z pricing", "dosing of cardiox", "the phase 3 trial results", "formulary status",
+          "side effect profile", "patient adherence programs", "the new inhaler device"]
+REACTIONS = [
+    "very positive about the data", "asked for samples", "wants to start two patients next week",
+    "declined to change current therapy", "no interest in the new indication", "not interested at this time",
+    "asked us to send the full study", "will call back after the committee meets", "needs time to review",
+    "seemed keen", "skeptical about cost", "happy with current treatment", "schedule a follow-up in june",
+    "mentioned a competitor rep visited", "agreed to try it with new patients",
+]
+# Positive keywords under a negation; the rules must never call these "interested"
+NEGATED = [
+    "isn't interested in the new formulation", "not really interested in switching", "not very interested",
+    "never interested in samples", "not keen on the device",
+]
+REACTIONS += NEGATED
+
+
+def synthetic_corpus(count: int, seed: int = 1) -> tuple:
+    rng = random.Random(seed)
+    notes = []
+    for _ in range(count):
+        parts = [rng.choice(OPENINGS).format(name=rng.choice(["lee", "patel", "smith"]), team=rng.choice(["icu", "gp"])),
+                 "discussed " + rng.choice(TOPICS)]
+        parts += rng.sample(REACTIONS, rng.randint(1, 2))
+        notes.append(", ".join(parts))
+    return notes, [stub_responder("Classify the outcome. Notes:" + text) for text in notes]
+
+
+def time_calls(function, notes: list) -> tuple:
+    latencies = []
+    for text in notes:
+        begin = time.perf_counter()
+        function(text)
+        latencies.append((time.perf_counter() - begin) * 1e6)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="NDJSON export with LLM-assigned outcomes")
+    parser.add_argument("--notes", type=int, default=5000, help="size of the synthetic corpus")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8,0.9,0.95")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--save", help="also save the trained model here")
+    args = parser.parse_args()
+
+    notes, labels = load_examples(args.file) if args.file else synthetic_corpus(args.notes)
+    examples = list(zip(notes, labels))
+    random.Random(2).shuffle(examples)
+    split = int(len(examples) * (1 - args.test_fraction))
+    train, test = examples[:split], examples[split:]
+
+    begin = time.perf_counter()
+    model = OutcomeModel.train([text for text, _ in train], [label for _, label in train], epochs=args.epochs)
+    print(f"{len(train)} training / {len(test)} held-out notes; trained in {time.perf_counter() - begin:.1f}s")
+    if args.save:
+        model.save(args.save)
+
+    decisions = []
+    for text, label in test:
+        rule_label, confidence = classify_rules(text)
+        tier = "rules"
+        if rule_label is None:
+            (rule_label, confidence), tier = model.predict(text), "model"
+        decisions.append((rule_label, confidence, tier, label))
+
+    # Against the stub the rules are compared with themselves
+    measure = "agreement" if args.file else "stub self-consistency"
+    if not args.file:
+        print("labels from the stub LLM: figures below are stub self-consistency, "
+              "not agreement with an LLM; pass --file for that")
+    print(f"\n{'threshold':>9} {'LLM calls avoided':>18} {measure:>21} {'rules':>7} {'model':>7}")
+    for threshold in (float(value) for value in args.thresholds.split(",")):
+        local = [decision for decision in decisions if decision[1] >= threshold]
+        agree = sum(label == truth for label, _, _, truth in local)
+        by_tier = {tier: sum(decision[2] == tier for decision in local) for tier in ("rules", "model")}
+        print(f"{threshold:>9.2f} {len(local) / len(decisions):>18.1%} "
+              f"{agree / len(local) if local else 0:>21.1%} {by_tier['rules']:>7} {by_tier['model']:>7}")
+    print(f"model alone, {measure} on all held-out notes: {sum(model.predict(text)[0] == label for text, label in test) / len(test):.1%}")
+
+    wrong = [phrase for phrase in NEGATED if classify_rules(phrase)[0] == "interested"]
+    print(f"negated phrasings labelled interested by the rules: {len(wrong)}/{len(NEGATED)}"
+          + (f" ({'; '.join(wrong)})" if wrong else ""))
+
+    sample = [text for text, _ in test]
+    rules_p50, rules_p99 = time_calls(classify_rules, sample)
+    model_p50, model_p99 = time_calls(model.predict, sample)
+    print(f"\nlatency per note: rules p50 {rules_p50:.1f}us p99 {rules_p99:.1f}us, "
+          f"model p50 {model_p50:.1f}us p99 {model_p99:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Local stand-in for the Groq chat completions API.
+
+Answers POST /openai/v1/chat/completions (plain and stream=True) with the
+deterministic stub answers from llm.py after a configurable delay, so the
+real GroqBackend, its HTTP pool and the SDK are exercised without network
+access. Point the app at it with GROQ_BASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python benchmarks/fake_groq.py [--port 8790] [--latency-ms 300] [--jitter-ms 100] [--tokens-per-sec 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm import stub_responder  # noqa: E402
+
+
+def create_app(latency: float, jitter: float, tokens_per_sec: float) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+
+    def completion(model: str, **fields) -> dict:
+        return {"id": f"chatcmpl-{uuid.uuid4().hex}", "created": int(time.time()), "model": model, **fields}
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        prompt = body["messages"][-1]["content"]
+        answer = stub_responder(prompt)
+        usage = {"prompt_tokens": len(prompt.split()), "completion_tokens": len(answer.split()),
+                 "total_tokens": len(prompt.split()) + len(answer.split())}
+        # Time to first token
+        await asyncio.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+        if not body.get("stream"):
+            return JSONResponse(completion(
+                body["model"], object="chat.completion", usage=usage,
+                choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": answer}}],
+            ))
+
+        async def chunks():
+            words = answer.split(" ")
+            for i, word in enumerate(words):
+                delta = {"role": "assistant", "content": word if i == 0 else " " + word}
+                yield "data: " + json.dumps(completion(
+                    body["model"], object="chat.completion.chunk",
+                    choices=[{"index": 0, "finish_reason": None, "delta": delta}],
+                )) + "\n\n"
+                if tokens_per_sec:
+                    await asyncio.sleep(1 / tokens_per_sec)
+            yield "data: " + json.dumps(completion(
+                body["model"], object="chat.completion.chunk", x_groq={"usage": usage},
+                choices=[{"index": 0, "finish_reason": "stop", "delta": {}}],
+            )) + "\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--tokens-per-sec", type=float, default=200, help="stream speed; 0 sends all at once")
+    args = parser.parse_args()
+    app = create_app(args.latency_ms / 1000, args.jitter_ms / 1000, args.tokens_per_sec)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Throughput scaling of /chat and /interactions across worker processes.
+
+For each worker count, starts `serve.py --workers N` with the stub LLM
+backend, drives a mixed /chat + POST /interactions load at a fixed
+concurrency and reports requests/sec, latency and scaling efficiency
+relative to one worker.
+
+Usage:
+    python benchmarks/load_test.py [--workers 1,2,4] [--concurrency 64] [--duration 20]
+
+Needs a reachable MySQL server (DB_* environment variables); point DB_NAME
+at a scratch database, since the run inserts interactions.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHAT_MESSAGES = [
+    "met dr.loadtest, discussed product z pricing, positive sentiment, shared brochure",
+    "fill form met dr.loadtest on a call, discussed dosing, neutral sentiment",
+    "met dr.loadtest attendees: anna, bob discussed trial enrollment outcomes: agreed to enroll",
+]
+
+
+def start_server(workers: int, port: int, stub_latency_ms: int) -> subprocess.Popen:
+    env = {**os.environ, "LLM_BACKEND": "stub", "LLM_STUB_LATENCY_MS": str(stub_latency_ms)}
+    return subprocess.Popen(
+        [sys.executable, "serve.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/db/pool/stats")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("server did not become ready")
+
+
+async def run_load(client: httpx.AsyncClient, hcp_id: str, concurrency: int, duration: float, write_ratio: float):
+    latencies = {"/chat": [], "/interactions": []}
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def user():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            if random.random() < write_ratio:
+                path, body = "/interactions", {
+                    "hcp_id": hcp_id, "interaction_type": "call", "date": "2025-06-05", "time": "09:30:00",
+                    "topic_discussed": random.choice(CHAT_MESSAGES) + f" #{random.randrange(10**6)}",
+                }
+            else:
+                path, body = "/chat", {"text": random.choice(CHAT_MESSAGES)}
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies[path].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else float("nan")
+
+
+async def bench(workers: int, args) -> float:
+    server = start_server(workers, args.port, args.stub_latency_ms)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+            await wait_ready(client)
+            saved = await client.post("/chat", json={"text": "save", "hcp_name": "loadtest"})
+            hcp_id = saved.json()["form_data"]["hcp_id"]
+            latencies, errors = await run_load(client, hcp_id, args.concurrency, args.duration, args.write_ratio)
+    finally:
+        server.terminate()
+        server.wait()
+    total = sum(len(values) for values in latencies.values())
+    rps = total / args.duration
+    print(f"workers={workers:<3} {rps:9.1f} req/s  errors={errors}")
+    for path, values in latencies.items():
+        print(f"    {path:14} n={len(values):<7} p50={percentile(values, 0.5):7.1f}ms "
+              f"p95={percentile(values, 0.95):7.1f}ms mean={statistics.fmean(values) * 1000 if values else 0:7.1f}ms")
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="share of requests that POST /interactions")
+    parser.add_argument("--stub-latency-ms", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    results = {}
+    for workers in (int(w) for w in args.workers.split(",")):
+        results[workers] = asyncio.run(bench(workers, args))
+    base_workers = min(results)
+    base = results[base_workers] / base_workers
+    print("\nscaling efficiency (1.0 = linear):")
+    for workers, rps in results.items():
+        print(f"    workers={workers:<3} {rps / (base * workers):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Throwaway MySQL/MariaDB server for benchmarks, without Docker.
+
+Initializes a fresh data directory in a temp dir and runs the locally
+installed mysqld on 127.0.0.1 with an empty root password. Everything is
+removed on stop().
+
+Usage (keeps a server running until Ctrl-C and prints its DB_* settings):
+    python benchmarks/mysqld.py [--port 3407]
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+
+
+class LocalMySQL:
+    def __init__(self, port: int = 3407, mysqld: str = None):
+        self.port = port
+        self.mysqld = mysqld or shutil.which("mysqld") or shutil.which("mariadbd")
+        if not self.mysqld:
+            raise RuntimeError("mysqld not found on PATH; install MySQL/MariaDB or set DB_HOST to use an existing server")
+        self.dir = None
+        self.process = None
+
+    def _initialize(self, datadir: str):
+        version = subprocess.run([self.mysqld, "--version"], capture_output=True, text=True).stdout
+        if "MariaDB" in version:
+            install = shutil.which("mariadb-install-db") or shutil.which("mysql_install_db")
+            command = [install, "--no-defaults", f"--datadir={datadir}", "--auth-root-authentication-method=normal"]
+        else:
+            command = [self.mysqld, "--no-defaults", "--initialize-insecure", f"--datadir={datadir}"]
+        subprocess.run(command, check=True, capture_output=True)
+
+    def start(self, timeout: float = 60) -> "LocalMySQL":
+        self.dir = tempfile.mkdtemp(prefix="hcp-mysqld-")
+        datadir = os.path.join(self.dir, "data")
+        self._initialize(datadir)
+        self.process = subprocess.Popen(
+            [
+                self.mysqld, "--no-defaults", f"--datadir={datadir}", f"--port={self.port}",
+                "--bind-address=127.0.0.1", f"--socket={os.path.join(self.dir, 'mysqld.sock')}",
+                f"--pid-file={os.path.join(self.dir, 'mysqld.pid')}", f"--tmpdir={self.dir}",
+                "--skip-log-bin", "--innodb-buffer-pool-size=256M", "--max-connections=500",
+            ],
+            stdout=subprocess.DEVNULL, stderr=open(os.path.join(self.dir, "error.log"), "w"),
+        )
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"mysqld exited; see {os.path.join(self.dir, 'error.log')}")
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.5)
+        self.stop()
+        raise RuntimeError("mysqld did not start in time")
+
+    def env(self) -> dict:
+        return {"DB_HOST": "127.0.0.1", "DB_PORT": str(self.port), "DB_USER": "root", "DB_PASSWORD": ""}
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.dir:
+            shutil.rmtree(self.dir, ignore_errors=True)
+            self.dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=3407)
+    args = parser.parse_args()
+    with LocalMySQL(args.port) as server:
+        print(" ".join(f"{key}={value}" for key, value in server.env().items()))
+        try:
+            server.process.wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
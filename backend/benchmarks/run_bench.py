@@ -0,0 +1,280 @@
+"""End-to-end benchmark: replay a recorded workload against the app, offline.
+
+Boots the fake Groq server (benchmarks/fake_groq.py), a throwaway mysqld
+(benchmarks/mysqld.py) unless DB_HOST points at an existing server, and
+the app itself through serve.py with the real Groq backend aimed at the
+fake server. It then seeds HCP profiles and replays the workload with a
+fixed number of concurrent clients. The report gives p50/p95/p99 latency
+per request name, throughput, error rate and the peak RSS of the server
+processes.
+
+Results can be written as JSON (--output) and checked against regression
+thresholds (--thresholds, default benchmarks/thresholds.json). The exit
+status is 1 when a threshold is exceeded.
+
+Workloads are JSONL files with one request per line:
+    {"name": "chat_fill", "method": "POST", "path": "/chat", "json": {...}}
+"{hcp_id:N}" and "{hcp_name:N}" in paths and bodies refer to the N-th
+seeded HCP profile.
+
+Usage:
+    python benchmarks/run_bench.py [--workload benchmarks/workloads/mixed.jsonl]
+        [--repeat 20] [--concurrency 16] [--workers 1] [--llm-latency-ms 300]
+        [--output results.json] [--thresholds benchmarks/thresholds.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import ExitStack
+
+import aiomysql
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+
+sys.path.insert(0, BENCH_DIR)
+
+from mysqld import LocalMySQL  # noqa: E402
+
+PLACEHOLDER = re.compile(r"\{(hcp_id|hcp_name):(\d+)\}")
+SCRATCH_DB = "hcp_bench_run"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(command: list, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env={**os.environ, **env},
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.3)
+    raise RuntimeError(f"{url} did not become ready")
+
+
+async def reset_database(db_env: dict):
+    conn = await aiomysql.connect(host=db_env["DB_HOST"], port=int(db_env["DB_PORT"]), user=db_env["DB_USER"],
+                                  password=db_env["DB_PASSWORD"], autocommit=True)
+    async with conn.cursor() as cursor:
+        await cursor.execute(f"DROP DATABASE IF EXISTS `{SCRATCH_DB}`")
+        await cursor.execute(f"CREATE DATABASE `{SCRATCH_DB}`")
+    conn.close()
+
+
+async def seed_profiles(db_env: dict, count: int) -> list:
+    """Insert HCP profiles "bench1".."benchN" (the app has created the tables by now)."""
+    profiles = [(str(uuid.uuid4()), f"bench{i}", "cardiology") for i in range(1, count + 1)]
+    conn = await aiomysql.connect(host=db_env["DB_HOST"], port=int(db_env["DB_PORT"]), user=db_env["DB_USER"],
+                                  password=db_env["DB_PASSWORD"], db=SCRATCH_DB, autocommit=True)
+    async with conn.cursor() as cursor:
+        await cursor.executemany("INSERT INTO hcp_profiles (hcp_id, name, specialty) VALUES (%s, %s, %s)", profiles)
+    conn.close()
+    return profiles
+
+
+def load_workload(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def resolve(request: dict, profiles: list) -> dict:
+    """Substitute {hcp_id:N} / {hcp_name:N} placeholders."""
+    def substitute(match):
+        hcp_id, name, _ = profiles[(int(match.group(2)) - 1) % len(profiles)]
+        return hcp_id if match.group(1) == "hcp_id" else name
+    return json.loads(PLACEHOLDER.sub(substitute, json.dumps(request)))
+
+
+def process_rss_mb(pid: int) -> tuple:
+    """(current, peak) resident memory of a process and its children, from /proc (Linux only)."""
+    current = peak = 0
+    pids = [pid]
+    while pids:
+        pid = pids.pop()
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        current += int(line.split()[1])
+                    elif line.startswith("VmHWM:"):
+                        peak += int(line.split()[1])
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+    return current / 1024, peak / 1024
+
+
+async def replay(base_url: str, requests: list, concurrency: int) -> dict:
+    latencies = {}
+    errors = {}
+    queue = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def client_loop(client: httpx.AsyncClient):
+        while not queue.empty():
+            request = queue.get_nowait()
+            name = request.get("name") or f"{request['method']} {request['path']}"
+            started = time.perf_counter()
+            try:
+                response = await client.request(request["method"], request["path"], json=request.get("json"))
+                await response.aread()
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.setdefault(name, []).append(time.perf_counter() - started)
+            else:
+                errors[name] = errors.get(name, 0) + 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def summarize(run: dict, rss: tuple) -> dict:
+    total = sum(len(values) for values in run["latencies"].values())
+    failed = sum(run["errors"].values())
+    results = {"requests": {}, "overall": {
+        "requests": total + failed,
+        "rps": total / run["elapsed"],
+        "error_rate": failed / (total + failed) if total + failed else 0.0,
+        "rss_mb": rss[0],
+        "peak_rss_mb": rss[1],
+    }}
+    for name in sorted(run["latencies"].keys() | run["errors"].keys()):
+        values = run["latencies"].get(name, [])
+        results["requests"][name] = {
+            "count": len(values),
+            "errors": run["errors"].get(name, 0),
+            "p50_ms": percentile(values, 0.50) if values else None,
+            "p95_ms": percentile(values, 0.95) if values else None,
+            "p99_ms": percentile(values, 0.99) if values else None,
+        }
+    return results
+
+
+def check_thresholds(results: dict, thresholds: dict) -> list:
+    """Return human-readable threshold violations; "max_*" are upper and "min_*" lower bounds."""
+    failures = []
+    for name, limits in thresholds.items():
+        measured = results["overall"] if name == "overall" else results["requests"].get(name)
+        if measured is None:
+            continue
+        for limit, bound in limits.items():
+            kind, metric = limit.split("_", 1)
+            value = measured.get(metric)
+            if value is None:
+                continue
+            if (kind == "max" and value > bound) or (kind == "min" and value < bound):
+                failures.append(f"{name}.{metric} = {value:.2f} ({kind} {bound})")
+    return failures
+
+
+async def run(args) -> dict:
+    with ExitStack() as stack:
+        if os.getenv("DB_HOST"):
+            db_env = {key: os.getenv(key, default) for key, default in
+                      (("DB_HOST", "localhost"), ("DB_PORT", "3306"), ("DB_USER", "root"), ("DB_PASSWORD", ""))}
+        else:
+            db_env = stack.enter_context(LocalMySQL(free_port())).env()
+        await reset_database(db_env)
+
+        llm_port, app_port = free_port(), free_port()
+        fake_llm = start([sys.executable, os.path.join(BENCH_DIR, "fake_groq.py"), "--port", str(llm_port),
+                          "--latency-ms", str(args.llm_latency_ms), "--jitter-ms", str(args.llm_jitter_ms)], {})
+        stack.callback(stop, fake_llm)
+        app = start([sys.executable, "serve.py", "--workers", str(args.workers), "--host", "127.0.0.1",
+                     "--port", str(app_port)], {
+            **db_env, "DB_NAME": SCRATCH_DB, "LLM_BACKEND": "groq", "GROQ_API_KEY": "fake",
+            "GROQ_BASE_URL": f"http://127.0.0.1:{llm_port}",
+        })
+        stack.callback(stop, app)
+        await wait_ready(f"http://127.0.0.1:{llm_port}/stats")
+        await wait_ready(f"http://127.0.0.1:{app_port}/db/pool/stats")
+
+        workload = load_workload(args.workload)
+        profiles = await seed_profiles(db_env, args.hcps)
+        requests = [resolve(request, profiles) for request in workload] * args.repeat
+        random.Random(args.seed).shuffle(requests)
+        replayed = await replay(f"http://127.0.0.1:{app_port}", requests, args.concurrency)
+        return summarize(replayed, process_rss_mb(app.pid))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", default=os.path.join(BENCH_DIR, "workloads", "mixed.jsonl"))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--hcps", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--thresholds", default=os.path.join(BENCH_DIR, "thresholds.json"))
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    overall = results["overall"]
+    print(f"{overall['requests']} requests, {overall['rps']:.1f} req/s, error rate {overall['error_rate']:.2%}, "
+          f"server RSS {overall['rss_mb']:.0f} MB (peak {overall['peak_rss_mb']:.0f} MB)")
+    print(f"{'request':22} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in results["requests"].items():
+        latencies = " ".join(f"{stats[key]:>9.1f}" if stats[key] is not None else f"{'-':>9}"
+                             for key in ("p50_ms", "p95_ms", "p99_ms"))
+        print(f"{name:22} {stats['count']:>6} {stats['errors']:>6} {latencies}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), **results}, f, indent=2)
+
+    failures = []
+    if args.thresholds and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            failures = check_thresholds(results, json.load(f))
+    for failure in failures:
+        print(f"THRESHOLD EXCEEDED: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
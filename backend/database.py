@@ -1,53 +1,143 @@
-import aiomysql
 import asyncio
+import os
+from contextlib import asynccontextmanager
+from time import perf_counter
+
+import aiomysql
+
+from metrics import POOL_WAIT_SECONDS, SQL_SECONDS, statement_label
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be acquired within the acquire timeout."""
+
+
+class TimedCursor(aiomysql.Cursor):
+    """Default cursor; records each statement in sql_query_duration_seconds."""
+
+    async def execute(self, query, args=None):
+        with SQL_SECONDS.time(statement=statement_label(query)):
+            return await super().execute(query, args)
+
+
+class ConnectionPool:
+    """aiomysql pool with acquire timeouts, idle health checks and utilization stats.
+
+    Settings come from the environment so each uvicorn worker can be sized
+    against MySQL max_connections:
+    DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME,
+    DB_POOL_MIN, DB_POOL_MAX, DB_POOL_RECYCLE (seconds),
+    DB_ACQUIRE_TIMEOUT (seconds), DB_PING_AFTER (idle seconds before a ping).
+    """
+
+    def __init__(self):
+        self.host = os.getenv("DB_HOST", "localhost")
+        self.port = int(os.getenv("DB_PORT", "3306"))
+        self.user = os.getenv("DB_USER", "root")
+        self.password = os.getenv("DB_PASSWORD", "")
+        self.db = os.getenv("DB_NAME", "patient_db")
+        self.minsize = int(os.getenv("DB_POOL_MIN", "1"))
+        self.maxsize = int(os.getenv("DB_POOL_MAX", "10"))
+        self.recycle = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+        self.acquire_timeout = float(os.getenv("DB_ACQUIRE_TIMEOUT", "10"))
+        self.ping_after = float(os.getenv("DB_PING_AFTER", "30"))
+        self._pool = None
+        self.waiting = 0
+        self.acquires = 0
+        self.timeouts = 0
+        self.failed_pings = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    async def open(self):
+        self._pool = await aiomysql.create_pool(
+            host=self.host, port=self.port, user=self.user, password=self.password, db=self.db,
+            autocommit=True, minsize=self.minsize, maxsize=self.maxsize, pool_recycle=self.recycle,
+            cursorclass=TimedCursor
+        )
+
+    @asynccontextmanager
+    async def acquire(self):
+        started = perf_counter()
+        self.waiting += 1
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise PoolTimeout(f"No database connection available within {self.acquire_timeout}s")
+        finally:
+            self.waiting -= 1
+        waited = perf_counter() - started
+        self.acquires += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        POOL_WAIT_SECONDS.observe(waited)
+        try:
+            # Connections idle longer than ping_after may have been dropped by the server
+            if asyncio.get_running_loop().time() - conn.last_usage > self.ping_after:
+                try:
+                    await conn.ping(reconnect=True)
+                except aiomysql.Error:
+                    self.failed_pings += 1
+                    raise
+            yield conn
+        finally:
+            self._pool.release(conn)
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    def stats(self):
+        size = self._pool.size if self._pool else 0
+        free = self._pool.freesize if self._pool else 0
+        return {
+            "size": size,
+            "free": free,
+            "in_use": size - free,
+            "min": self.minsize,
+            "max": self.maxsize,
+            "utilization": (size - free) / self.maxsize,
+            "waiting": self.waiting,
+            "acquires": self.acquires,
+            "timeouts": self.timeouts,
+            "failed_pings": self.failed_pings,
+            "wait_ms_avg": self.wait_seconds_total / self.acquires * 1000 if self.acquires else 0.0,
+            "wait_ms_max": self.wait_seconds_max * 1000,
+        }
+
+
+@asynccontextmanager
+async def transaction(pool):
+    """Yield a cursor whose statements commit together (the pool autocommits otherwise)."""
+    async with pool.acquire() as conn:
+        await conn.begin()
+        try:
+            async with conn.cursor() as cursor:
+                yield cursor
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
 
 # Global connection pool
 pool = None
 
-async def init_pool():
-    global pool
-    try:
-        pool = await aiomysql.create_pool(
-            host='localhost',
-            port=3306,
-            user='root',
-            password='',  # Empty password
-            db='patient_db',
-            autocommit=True,
-            minsize=1,
-            maxsize=10
-        )
-        print("Database connection pool initialized successfully")
-        return pool
-    except aiomysql.Error as e:
-        print(f"MySQL pool initialization error: {e}")
-        return None
-    except Exception as e:
-        print(f"Unexpected error in pool initialization: {e}")
-        return None
-
-async def get_db_connection():
+
+async def init_pool() -> ConnectionPool:
     global pool
-    if pool is None:
-        pool = await init_pool()
-        if pool is None:
-            print("Failed to initialize connection pool")
-            return None
-    try:
-        conn = await pool.acquire()
-        print("Database connection acquired from pool")
-        return conn
-    except aiomysql.Error as e:
-        print(f"MySQL connection error: {e}")
-        return None
-    except Exception as e:
-        print(f"Unexpected error in database connection: {e}")
-        return None
+    pool = ConnectionPool()
+    await pool.open()
+    print(f"Database connection pool initialized (min={pool.minsize}, max={pool.maxsize})")
+    return pool
+
 
 async def close_pool():
     global pool
     if pool is not None:
-        pool.close()
-        await pool.wait_closed()
+        await pool.close()
         print("Database connection pool closed")
         pool = None
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import os
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+from batching import MicroBatcher
+from llm import DEFAULT_MODEL, LLMError, get_llm
+from llm_cache import get_cache, make_key
+from metrics import OUTCOME_SOURCES
+from outcome_model import OUTCOME_LABELS, classify_local, normalize_label
+
+SUMMARY_PROMPT = (
+    "Analyze the following meeting notes and provide a concise, factual summary. "
+    "Focus on key discussion points, decisions made, concerns raised, and any action items. "
+    "Avoid generic or instructional responses. Notes:\n"
+)
+
+OUTCOME_PROMPT = (
+    "Based on these notes, classify the outcome as 'interested', 'not interested', or 'follow-up needed'. "
+    "Only return one of these three labels. Notes:\n"
+)
+
+BATCH_OUTCOME_PROMPT = (
+    "Classify the outcome of each of the numbered meeting notes below as 'interested', 'not interested' "
+    "or 'follow-up needed'. Respond with only a JSON array with one entry per note, in order, "
+    "each like {\"id\": 1, \"outcome\": \"interested\"}. Notes:\n"
+)
+
+STRUCTURED_PROMPT = (
+    "Analyze the following meeting notes. Respond with only a JSON object with two keys: "
+    "\"summary\", a concise, factual summary of key discussion points, decisions, concerns and action items, "
+    "and \"outcome\", exactly one of 'interested', 'not interested' or 'follow-up needed'. Notes:\n"
+)
+
+
+class Enrichment(BaseModel):
+    summary: str
+    outcome: str
+
+    @field_validator("summary")
+    @classmethod
+    def summary_not_empty(cls, value: str) -> str:
+        value = value.strip()
+        if not value:
+            raise ValueError("summary is empty")
+        return value
+
+    @field_validator("outcome")
+    @classmethod
+    def outcome_is_label(cls, value: str) -> str:
+        value = value.strip().lower()
+        if value not in OUTCOME_LABELS:
+            raise ValueError(f"outcome must be one of {OUTCOME_LABELS}")
+        return value
+
+
+async def cached_complete(template: str, notes: str, compute=None) -> str:
+    """Complete `template + notes`, served from the LLM cache when the notes were seen before."""
+    key = make_key(DEFAULT_MODEL, template, notes)
+    return await get_cache().get_or_compute(key, compute or (lambda: get_llm().complete(template + notes)))
+
+
+async def summarize(notes: str) -> str:
+    """Summarize interaction notes."""
+    summary = await cached_complete(SUMMARY_PROMPT, notes)
+    return summary.strip()
+
+
+async def classify_detailed(notes: str) -> Tuple[str, float | None, str]:
+    """Classify the outcome of interaction notes as (label, confidence, source).
+
+    The local classifier answers when it is at least OUTCOME_CONFIDENCE
+    sure (default 0.8; above 1 disables it); otherwise the LLM does and its
+    answer is normalized to a label (confidence None). With
+    CLASSIFY_BATCH_SIZE > 1, LLM cache misses are batched with concurrent
+    calls into a single request (see classify_batch).
+    """
+    label, confidence, source = classify_local(notes)
+    if label is not None and confidence >= float(os.getenv("OUTCOME_CONFIDENCE", "0.8")):
+        OUTCOME_SOURCES.inc(source=source)
+        return label, confidence, source
+    batcher = get_classify_batcher()
+    compute = (lambda: batcher.submit(notes)) if batcher else None
+    outcome = await cached_complete(OUTCOME_PROMPT, notes, compute)
+    OUTCOME_SOURCES.inc(source="llm")
+    return normalize_label(outcome), None, "llm"
+
+
+async def classify(notes: str) -> str:
+    """Classify the outcome of interaction notes; always one of OUTCOME_LABELS."""
+    label, _, _ = await classify_detailed(notes)
+    return label
+
+
+def parse_batch(text: str, count: int) -> List[str | None]:
+    """Labels from a batched classification answer, by position; None where an entry is missing or invalid."""
+    labels = [None] * count
+    match = re.search(r"\[.*\]", text, re.DOTALL)
+    if not match:
+        raise ValueError("no JSON array in response")
+    entries = json.loads(match.group(0))
+    if not isinstance(entries, list):
+        raise ValueError("expected a JSON array")
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        position, outcome = entry.get("id"), entry.get("outcome")
+        if not isinstance(position, int) or not 1 <= position <= count or not isinstance(outcome, str):
+            continue
+        outcome = outcome.strip().lower()
+        if outcome in OUTCOME_LABELS and labels[position - 1] is None:
+            labels[position - 1] = outcome
+    return labels
+
+
+async def classify_batch(batch: Sequence[str]) -> List[str]:
+    """Classify several notes with one LLM call.
+
+    Notes the batched answer does not label validly, or all of them if the
+    call or the parse fails, are classified one by one instead.
+    """
+    labels = [None] * len(batch)
+    if len(batch) > 1:
+        numbered = "\n".join(f"{i}. {' '.join(notes.split())}" for i, notes in enumerate(batch, 1))
+        try:
+            labels = parse_batch(await get_llm().complete(BATCH_OUTCOME_PROMPT + numbered), len(batch))
+        except (LLMError, ValueError):
+            pass
+    missing = [i for i, label in enumerate(labels) if label is None]
+    fallback = await asyncio.gather(
+        *(get_llm().complete(OUTCOME_PROMPT + batch[i]) for i in missing), return_exceptions=True
+    )
+    for i, outcome in zip(missing, fallback):
+        labels[i] = outcome
+    return labels
+
+
+# Batches concurrent classify() cache misses; None when CLASSIFY_BATCH_SIZE <= 1
+classify_batcher = None
+
+
+def get_classify_batcher() -> MicroBatcher | None:
+    global classify_batcher
+    max_size = int(os.getenv("CLASSIFY_BATCH_SIZE", "1"))
+    if max_size <= 1:
+        return None
+    if classify_batcher is None:
+        classify_batcher = MicroBatcher(
+            classify_batch, max_size=max_size, max_wait=float(os.getenv("CLASSIFY_BATCH_WAIT_MS", "5")) / 1000
+        )
+    return classify_batcher
+
+
+async def stream_summary(notes: str):
+    """Yield summary chunks as the LLM produces them; a cached summary is yielded whole.
+
+    The complete summary is cached, so a later summarize() of the same notes is a hit.
+    """
+    cache = get_cache()
+    key = make_key(DEFAULT_MODEL, SUMMARY_PROMPT, notes)
+    cached = await cache.get(key)
+    if cached is not None:
+        cache.hits += 1
+        yield cached.strip()
+        return
+    cache.misses += 1
+    chunks = []
+    async for chunk in get_llm().stream(SUMMARY_PROMPT + notes):
+        chunks.append(chunk)
+        yield chunk
+    await cache.set(key, "".join(chunks))
+
+
+def parse_structured(text: str) -> Enrichment:
+    """Parse and validate a combined summary/outcome JSON answer."""
+    # Models often wrap JSON in a markdown code fence
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        raise ValueError("no JSON object in response")
+    return Enrichment.model_validate(json.loads(match.group(0)))
+
+
+async def enrich_concurrent(notes: str) -> Dict:
+    summary, outcome = await asyncio.gather(summarize(notes), classify(notes))
+    return {"summary": summary, "outcome": outcome}
+
+
+async def enrich_structured(notes: str) -> Dict:
+    async def compute():
+        # Only validated answers are cached
+        response = await get_llm().complete(STRUCTURED_PROMPT + notes)
+        return parse_structured(response).model_dump_json()
+
+    try:
+        result = parse_structured(await cached_complete(STRUCTURED_PROMPT, notes, compute))
+    except (ValueError, ValidationError):
+        # Fall back to the two-call path rather than storing a malformed answer
+        return await enrich_concurrent(notes)
+    return {"summary": result.summary, "outcome": result.outcome}
+
+
+async def enrich(notes: str, mode: str = None) -> Dict:
+    """Generate summary and outcome for interaction notes.
+
+    ENRICHMENT_MODE selects "concurrent" (two calls fanned out) or
+    "structured" (one JSON call, falling back to concurrent).
+    """
+    if not notes:
+        return {"summary": "", "outcome": ""}
+    mode = mode or os.getenv("ENRICHMENT_MODE", "concurrent")
+    if mode == "structured":
+        return await enrich_structured(notes)
+    return await enrich_concurrent(notes)
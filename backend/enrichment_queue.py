@@ -0,0 +1,128 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+# Markers stored in hcp_interactions.outcome until a background worker fills it in.
+# A worker claims a row by moving it from PENDING to RUNNING, so with several
+# server processes each row is still enriched only once.
+PENDING = "pending"
+RUNNING = "running"
+
+
+class EnrichmentQueue:
+    """In-process queue of deferred enrichment jobs drained by a worker pool.
+
+    `handler(interaction_id, notes)` does the actual work and is retried with
+    exponential backoff. Job status is kept for the most recent `max_tracked`
+    interactions so clients can poll or wait for completion. `sweep()`, if
+    given, runs on start and then every `sweep_interval` seconds to requeue
+    rows this process doesn't know about (left by a restart or a dead worker).
+    """
+
+    def __init__(self, handler, workers: int = 4, max_retries: int = 3, backoff: float = 0.5,
+                 max_size: int = 10000, max_tracked: int = 10000, sweep=None, sweep_interval: float = 60):
+        self.handler = handler
+        self.sweep = sweep
+        self.sweep_interval = sweep_interval
+        self.sweep_errors = 0
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_tracked = max_tracked
+        self.queue = asyncio.Queue(max_size)
+        self.status = OrderedDict()
+        self._events = {}
+        self._tasks = []
+        self._sweeper_task = None
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.sweep is not None:
+            self._sweeper_task = asyncio.create_task(self._sweeper())
+
+    async def stop(self):
+        tasks = self._tasks + ([self._sweeper_task] if self._sweeper_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._sweeper_task = None
+
+    async def submit(self, interaction_id: int, notes: str):
+        self._track(interaction_id, {"status": PENDING, "attempts": 0, "error": None, "queued_at": time.time()})
+        self._events[interaction_id] = asyncio.Event()
+        await self.queue.put((interaction_id, notes))
+
+    def get_status(self, interaction_id: int) -> Dict[str, Any]:
+        return self.status.get(interaction_id)
+
+    def is_active(self, interaction_id: int) -> bool:
+        """Whether this process has the job queued or running."""
+        status = self.status.get(interaction_id)
+        return status is not None and status["status"] in (PENDING, RUNNING)
+
+    async def wait(self, interaction_id: int, timeout: float) -> Dict[str, Any]:
+        """Wait up to `timeout` seconds for a job to finish and return its status."""
+        event = self._events.get(interaction_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get_status(interaction_id)
+
+    def stats(self) -> Dict[str, Any]:
+        states = [status["status"] for status in self.status.values()]
+        return {
+            "queued": self.queue.qsize(),
+            "running": states.count(RUNNING),
+            "failed": states.count("failed"),
+            "tracked": len(self.status),
+            "workers": len(self._tasks),
+            "sweep_errors": self.sweep_errors,
+        }
+
+    def _track(self, interaction_id: int, status: Dict[str, Any]):
+        self.status[interaction_id] = status
+        self.status.move_to_end(interaction_id)
+        while len(self.status) > self.max_tracked:
+            old_id, _ = self.status.popitem(last=False)
+            self._events.pop(old_id, None)
+
+    async def _sweeper(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                # Database unavailable: try again next interval
+                self.sweep_errors += 1
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _worker(self):
+        while True:
+            interaction_id, notes = await self.queue.get()
+            status = self.status.get(interaction_id) or {"status": PENDING, "attempts": 0, "error": None}
+            try:
+                while True:
+                    status["attempts"] += 1
+                    status["status"] = RUNNING
+                    try:
+                        await self.handler(interaction_id, notes)
+                        status["status"] = "done"
+                        status["error"] = None
+                        break
+                    except Exception as e:
+                        status["error"] = str(e)
+                        if status["attempts"] > self.max_retries:
+                            status["status"] = "failed"
+                            break
+                        delay = self.backoff * 2 ** (status["attempts"] - 1)
+                        await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            finally:
+                status["finished_at"] = time.time()
+                event = self._events.get(interaction_id)
+                if event is not None:
+                    event.set()
+                self.queue.task_done()
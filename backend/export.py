@@ -0,0 +1,68 @@
+"""Streaming export of hcp_interactions as NDJSON or CSV.
+
+Rows are read through an unbuffered server-side cursor and encoded chunk
+by chunk, so memory use does not grow with the size of the table.
+"""
+import csv
+import io
+from typing import AsyncIterator, Sequence
+
+import aiomysql
+
+from serialization import row_converter, dumps
+
+EXPORT_COLUMNS = (
+    "id", "hcp_id", "interaction_type", "date", "time", "attendees", "topic_discussed",
+    "materials_shared", "hcp_sentiment", "outcomes", "follow_up_action", "summary", "outcome", "updated_at"
+)
+export_row = row_converter(EXPORT_COLUMNS)
+
+
+async def stream_rows(pool, where: str, params: Sequence, order_by: str,
+                      chunk_size: int = 1000) -> AsyncIterator[list]:
+    """Yield lists of up to `chunk_size` row dicts from a server-side cursor."""
+    async with pool.acquire() as conn:
+        # Not "async with": closing an SSCursor drains the rest of the result set
+        cursor = await conn.cursor(aiomysql.SSCursor)
+        try:
+            # Slow consumers would otherwise hit the default 60s write timeout mid-stream
+            await cursor.execute("SELECT @@SESSION.net_write_timeout")
+            (write_timeout,) = await cursor.fetchone()
+            await cursor.execute("SET SESSION net_write_timeout = 3600")
+            await cursor.execute(
+                f"SELECT {', '.join(EXPORT_COLUMNS)} FROM hcp_interactions {where} ORDER BY {order_by}",
+                params
+            )
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [export_row(row) for row in rows]
+            await cursor.close()
+            # The connection goes back to the pool: restore the session default
+            async with conn.cursor() as reset:
+                await reset.execute("SET SESSION net_write_timeout = %s", (write_timeout,))
+        except BaseException:
+            # An abandoned stream leaves unread rows on the wire, and the long
+            # write timeout is still set; drop the connection instead.
+            conn.close()
+            raise
+
+
+async def ndjson_chunks(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    async for rows in chunks:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+async def csv_chunks(chunks: AsyncIterator[list]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    async for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Empty export: still send the header row
+        yield buffer.getvalue().encode("utf-8")
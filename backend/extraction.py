@@ -0,0 +1,172 @@
+"""Entity extraction for chat messages.
+
+All patterns are compiled once into a single alternation, so a message is
+tokenized in one left-to-right pass. Free-text fields ("discussed ...",
+"attendees: ...") take the text up to the next field marker.
+"""
+import re
+from datetime import datetime
+from typing import Any, Dict
+
+TOKEN_PATTERN = re.compile(
+    r"""
+      (?P<update>\b(?P<update_field>hcp\s+specialty|hcp\s+sentiment|interaction\s+type|follow-up\s+action
+                  |follow-up|date|time|meeting|attendees|topic|materials|outcomes)\s+to\s+)
+    | (?P<command>\b(?:retrieve|fetch|update|replace)\b)(?:\s+dr\.?\s*(?P<fetch_name>\w+))?
+    | \bmet\s+dr\.?\s*(?P<met_name>\w+)
+    | \bhcp\s*(?P<hcp_id>\d+)\b
+    | \b(?:hcp\s+)?specialty:\s*(?P<specialty>\w+)
+    | \b(?P<sentiment>positive|neutral|negative)\s*sentiment\b
+    | \b(?P<date>\d{4}-\d{2}-\d{2})\b
+    | (?P<today>\btoday\b)
+    | \b(?P<time>\d{1,2}:\d{2}(?::\d{2})?)\b
+    | (?P<attendees>\battendees:)
+    | (?P<topic_discussed>\bdiscussed\b|\btopic:)
+    | (?P<materials_shared>\bshared\b|\bmaterials?:)
+    | (?P<outcomes>\boutcomes?:)
+    | (?P<follow_up_action>\bfollow[- ]up(?:\s+action)?:?)
+    | \b(?P<interaction_type>meeting|call|email|attendance)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Markers that open a free-text field running up to the next hard token
+VALUE_FIELDS = ("attendees", "topic_discussed", "materials_shared", "outcomes", "follow_up_action")
+
+# Tokens that may appear inside free text without ending it
+SOFT_TOKENS = ("interaction_type", "command")
+
+AND_SPLIT = re.compile(r"\s+and\s+", re.IGNORECASE)
+FIELD_SEPARATOR = re.compile(r"[\s-]+")
+
+STRIP_CHARS = " ,;.:-\t\n"
+TRAILING_WORDS = ("and", "with")
+
+UPDATE_FIELD_MAPPING = {
+    "hcp_specialty": "specialty",
+    "hcp_sentiment": "hcp_sentiment",
+    "interaction_type": "interaction_type",
+    "date": "date",
+    "time": "time",
+    "meeting": "meeting",
+    "attendees": "attendees",
+    "topic": "topic_discussed",
+    "materials": "materials_shared",
+    "outcomes": "outcomes",
+    "follow_up": "follow_up_action",
+    "follow_up_action": "follow_up_action"
+}
+
+
+def _clean(value: str) -> str | None:
+    """Trim separators and dangling conjunctions left before the next marker."""
+    value = value.strip(STRIP_CHARS)
+    head, sep, last = value.rpartition(" ")
+    while sep and last.lower() in TRAILING_WORDS:
+        value = head.rstrip(STRIP_CHARS)
+        head, sep, last = value.rpartition(" ")
+    return value or None
+
+
+def _normalize_time(value: str) -> str:
+    parts = value.split(":")
+    if len(parts) == 2:
+        parts.append("00")
+    return ":".join(part.zfill(2) for part in parts)
+
+
+def parse_message(text: str) -> Dict[str, Any]:
+    """Extract form fields and command details from a chat message."""
+    tokens = [(match.lastgroup, match) for match in TOKEN_PATTERN.finditer(text)]
+
+    entities = {
+        "is_fetch_command": False,
+        "command": None,
+        "update_field": None,
+        "update_value": None,
+        "hcp_id": None,
+        "hcp_name": None,
+        "specialty": None,
+        "interaction_type": None,
+        "date": None,
+        "time": None,
+        "attendees": None,
+        "topic_discussed": None,
+        "materials_shared": None,
+        "hcp_sentiment": None,
+        "outcomes": None,
+        "follow_up_action": None
+    }
+    met_name = fetch_name = sentiment = None
+    for kind, match in tokens:
+        if kind in ("command", "fetch_name") and entities["command"] is None:
+            entities["command"] = match.group("command").lower()
+            fetch_name = match.group("fetch_name")
+        elif kind == "interaction_type" and entities["interaction_type"] is None:
+            entities["interaction_type"] = match.group("interaction_type")
+    entities["is_fetch_command"] = entities["command"] is not None
+    # "<field> to <value>" is only an update on a fetched interaction; otherwise it is plain text
+    hard = [
+        (kind, match) for kind, match in tokens
+        if kind not in SOFT_TOKENS + ("fetch_name",) and (kind != "update" or entities["is_fetch_command"])
+    ]
+    ends = [match.start() for _, match in hard] + [len(text)]
+    for index, (kind, match) in enumerate(hard):
+        if kind == "update":
+            if entities["update_field"]:
+                continue
+            field = FIELD_SEPARATOR.sub("_", match.group("update_field").lower())
+            entities["update_field"] = UPDATE_FIELD_MAPPING.get(field)
+            entities["update_value"] = _clean(AND_SPLIT.split(text[match.end():], 1)[0])
+        elif kind in VALUE_FIELDS:
+            if entities[kind] is None:
+                entities[kind] = _clean(text[match.end():ends[index + 1]])
+        elif kind == "met_name":
+            met_name = met_name or match.group("met_name")
+        elif kind == "hcp_id":
+            entities["hcp_id"] = entities["hcp_id"] or match.group("hcp_id")
+        elif kind == "specialty":
+            entities["specialty"] = entities["specialty"] or match.group("specialty")
+        elif kind == "sentiment":
+            sentiment = sentiment or match.group("sentiment").lower()
+        elif kind == "date":
+            entities["date"] = entities["date"] or match.group("date")
+        elif kind == "today":
+            entities["date"] = entities["date"] or datetime.now().strftime('%Y-%m-%d')
+        elif kind == "time":
+            entities["time"] = entities["time"] or _normalize_time(match.group("time"))
+
+    entities["hcp_name"] = met_name or fetch_name
+    # A sentiment inside an update command is the new value, not a form field
+    entities["hcp_sentiment"] = sentiment if not entities["update_field"] else None
+    return entities
+
+
+# Chat intents in priority order: the first one present in a message wins
+INTENTS = ("fetch", "fill", "save", "edit", "delete", "summarize")
+
+INTENT_PATTERN = re.compile(
+    r"""
+      (?P<fetch>\b(?:retrieve|fetch|update|replace)\b)
+    | (?P<fill>\bfill\s+form\b|\bmet\b)
+    | (?P<save>\blog\s+interaction\b|\bsave\b)
+    | (?P<edit>\bedit\s+interaction\b)
+    | (?P<delete>\bdelete\s+interaction\b)
+    | (?P<summarize>\bsummari[sz]e\b)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+def detect_intent(text: str) -> str:
+    """Return the command a chat message asks for, or "unknown".
+
+    Keywords match whole words only, so "metformin" is not "met".
+    """
+    found = {match.lastgroup for match in INTENT_PATTERN.finditer(text)}
+    if len(found) == 1:
+        return found.pop()
+    for intent in INTENTS:
+        if intent in found:
+            return intent
+    return "unknown"
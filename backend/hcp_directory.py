@@ -0,0 +1,134 @@
+"""In-memory directory of HCP profiles.
+
+Profiles are indexed by hcp_id and by normalized name, warm-loaded at
+startup and reloaded in the background once older than the TTL. Writes
+go to MySQL first and are then applied to the indexes (write-through).
+A lookup that misses the indexes falls back to a single-row query, so
+profiles created by other processes are still found.
+"""
+import asyncio
+import os
+import re
+import time
+from typing import Any, Dict
+
+NAME_PREFIX = re.compile(r"^(?:dr\.?|doctor)\s*", re.IGNORECASE)
+
+
+def normalize_name(name: str) -> str:
+    """Fold case, whitespace and a leading "Dr." so "Dr. Davis" and "davis" match."""
+    name = " ".join(name.split()).casefold()
+    return NAME_PREFIX.sub("", name)
+
+
+class HCPDirectory:
+    def __init__(self, ttl: float = 300, max_entries: int = 100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.by_id = {}
+        self.by_name = {}
+        self.loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._refresh_task = None
+
+    async def warm(self, pool):
+        """(Re)load up to max_entries profiles and swap in fresh indexes."""
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    "SELECT hcp_id, name, specialty FROM hcp_profiles LIMIT %s", (self.max_entries,)
+                )
+                rows = await cursor.fetchall()
+        by_id = {}
+        by_name = {}
+        for hcp_id, name, specialty in rows:
+            profile = {"hcp_id": hcp_id, "name": name, "specialty": specialty}
+            by_id[hcp_id] = profile
+            if name:
+                by_name.setdefault(normalize_name(name), profile)
+        self.by_id, self.by_name = by_id, by_name
+        self.loaded_at = time.time()
+
+    def _refresh_if_stale(self, pool):
+        if time.time() - self.loaded_at < self.ttl:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.warm(pool))
+
+    def put(self, profile: Dict[str, Any]):
+        """Apply a profile that was just written to hcp_profiles."""
+        old = self.by_id.get(profile["hcp_id"])
+        if old and old.get("name") and normalize_name(old["name"]) != normalize_name(profile.get("name") or ""):
+            self.by_name.pop(normalize_name(old["name"]), None)
+        if len(self.by_id) >= self.max_entries and old is None:
+            return
+        self.by_id[profile["hcp_id"]] = profile
+        if profile.get("name"):
+            self.by_name[normalize_name(profile["name"])] = profile
+
+    async def _query(self, pool, column: str, value: str) -> Dict[str, Any] | None:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    f"SELECT hcp_id, name, specialty FROM hcp_profiles WHERE {column} = %s", (value,)
+                )
+                row = await cursor.fetchone()
+        if not row:
+            return None
+        profile = {"hcp_id": row[0], "name": row[1], "specialty": row[2]}
+        self.put(profile)
+        return profile
+
+    async def get(self, pool, hcp_id: str) -> Dict[str, Any] | None:
+        self._refresh_if_stale(pool)
+        profile = self.by_id.get(hcp_id)
+        if profile is not None:
+            self.hits += 1
+            return profile
+        self.misses += 1
+        return await self._query(pool, "hcp_id", hcp_id)
+
+    async def find_by_name(self, pool, name: str) -> Dict[str, Any] | None:
+        self._refresh_if_stale(pool)
+        profile = self.by_name.get(normalize_name(name))
+        if profile is not None:
+            self.hits += 1
+            return profile
+        self.misses += 1
+        return await self._query(pool, "name", name)
+
+    async def lookup(self, pool, hcp_id: str = None, name: str = None) -> Dict[str, Any] | None:
+        """Find an HCP by ID or name without creating anything."""
+        if hcp_id:
+            return await self.get(pool, hcp_id)
+        if name:
+            return await self.find_by_name(pool, name)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "profiles": len(self.by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "age_seconds": time.time() - self.loaded_at if self.loaded_at else None,
+        }
+
+
+# Process-wide directory, created on first use or at startup
+directory = None
+
+
+def init_directory() -> HCPDirectory:
+    global directory
+    directory = HCPDirectory(
+        ttl=float(os.getenv("HCP_CACHE_TTL", "300")),
+        max_entries=int(os.getenv("HCP_CACHE_MAX", "100000")),
+    )
+    return directory
+
+
+def get_directory() -> HCPDirectory:
+    if directory is None:
+        init_directory()
+    return directory
@@ -0,0 +1,109 @@
+"""Bulk ingest of interactions: multi-row inserts in a single transaction."""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+import rollups
+
+INSERT_COLUMNS = (
+    "hcp_id", "interaction_type", "date", "time", "attendees", "topic_discussed",
+    "materials_shared", "hcp_sentiment", "outcomes", "follow_up_action", "summary", "outcome"
+)
+
+INSERT_SQL = f"INSERT INTO hcp_interactions ({', '.join(INSERT_COLUMNS)}) VALUES "
+ROW_PLACEHOLDER = f"({', '.join(['%s'] * len(INSERT_COLUMNS))})"
+
+# auto_increment_increment, read on first use
+autoinc_step = None
+
+
+def parse_body(body: bytes, content_type: str) -> List[Any]:
+    """Decode a JSON array or an NDJSON upload (one object per line)."""
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        return [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+    items = json.loads(body)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array of interactions")
+    return items
+
+
+def to_params(item: Dict[str, Any], summary: str | None, outcome: str | None) -> tuple:
+    """Build INSERT parameters, raising ValueError on a bad date or time."""
+    date = item.get("date")
+    time = item.get("time")
+    return (
+        item["hcp_id"], item.get("interaction_type"),
+        datetime.strptime(date, '%Y-%m-%d').date() if date else None,
+        datetime.strptime(time, '%H:%M:%S').time() if time else None,
+        item.get("attendees"), item.get("topic_discussed"), item.get("materials_shared"),
+        item.get("hcp_sentiment"), item.get("outcomes"), item.get("follow_up_action"),
+        summary, outcome
+    )
+
+
+async def existing_hcp_ids(pool, hcp_ids: Sequence[str], chunk_size: int = 1000) -> set:
+    """Return which of `hcp_ids` exist, with one IN (...) query per chunk."""
+    found = set()
+    hcp_ids = list(hcp_ids)
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            for i in range(0, len(hcp_ids), chunk_size):
+                chunk = hcp_ids[i:i + chunk_size]
+                await cursor.execute(
+                    f"SELECT hcp_id FROM hcp_profiles WHERE hcp_id IN ({', '.join(['%s'] * len(chunk))})",
+                    chunk
+                )
+                found.update(row[0] for row in await cursor.fetchall())
+    return found
+
+
+async def get_autoinc_step(pool) -> int:
+    """Spacing of the ids one multi-row INSERT gets (auto_increment_increment).
+
+    A simple multi-row INSERT always gets consecutive ids, this far apart,
+    under every innodb_autoinc_lock_mode: even with 2 (interleaved, the
+    MySQL 8 default) only bulk inserts whose row count is not known up
+    front, such as INSERT ... SELECT, can interleave theirs.
+    """
+    global autoinc_step
+    if autoinc_step is None:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT @@auto_increment_increment")
+                (increment,) = await cursor.fetchone()
+        autoinc_step = int(increment)
+    return autoinc_step
+
+
+async def insert_rows(pool, params: List[tuple], chunk_size: int = 500) -> List[int]:
+    """Insert all rows in one transaction and return their ids in order.
+
+    Each chunk is sent as one explicit multi-row INSERT rather than through
+    executemany, which may split a long batch into several statements; its
+    ids are computed from lastrowid (see get_autoinc_step). A chunk whose
+    row count does not match what was sent fails the whole batch rather
+    than returning wrong ids.
+    """
+    step = await get_autoinc_step(pool)
+    ids = []
+    async with pool.acquire() as conn:
+        await conn.begin()
+        try:
+            async with conn.cursor() as cursor:
+                for i in range(0, len(params), chunk_size):
+                    chunk = params[i:i + chunk_size]
+                    await cursor.execute(
+                        INSERT_SQL + ", ".join([ROW_PLACEHOLDER] * len(chunk)),
+                        [value for row in chunk for value in row]
+                    )
+                    if cursor.rowcount != len(chunk):
+                        raise RuntimeError(f"Inserted {cursor.rowcount} rows, expected {len(chunk)}")
+                    first = cursor.lastrowid
+                    last = first + (len(chunk) - 1) * step
+                    ids.extend(range(first, last + 1, step))
+                    await rollups.add(cursor, "id BETWEEN %s AND %s", (first, last))
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+    return ids
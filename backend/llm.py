@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import re
+from time import perf_counter
+
+import httpx
+from groq import AsyncGroq
+
+from metrics import LLM_SECONDS, LLM_TOKENS
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gemma2-9b-it")
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails or times out."""
+
+
+def count_tokens(usage):
+    LLM_TOKENS.inc(usage.prompt_tokens, type="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens, type="completion")
+
+
+class GroqBackend:
+    """Groq chat completions over a pooled, keep-alive HTTP transport."""
+
+    def __init__(self, api_key: str, timeout: float = 30.0, max_connections: int = 20, base_url: str = None):
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self.client = AsyncGroq(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self.http_client,
+            timeout=timeout,
+            max_retries=0,
+        )
+
+    async def complete(self, prompt: str, model: str, **kwargs) -> str:
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            **kwargs
+        )
+        if response.usage:
+            count_tokens(response.usage)
+        return response.choices[0].message.content or ""
+
+    async def stream(self, prompt: str, model: str, **kwargs):
+        response = await self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            stream=True,
+            **kwargs
+        )
+        async for chunk in response:
+            # Groq reports usage on the last chunk
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage:
+                count_tokens(usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+
+def stub_responder(prompt: str) -> str:
+    """Deterministic offline answer for the prompts used by the interaction tools."""
+    notes = prompt.split("Notes:", 1)[-1].strip().lower()
+    # Drop quoted label lists so they don't leak into the keyword match
+    notes = re.sub(r"'[^']*'", "", notes)
+    if "json object" in prompt.lower():
+        return json.dumps({
+            "summary": stub_responder("Summarize. Notes:" + notes),
+            "outcome": stub_responder("Classify. Notes:" + notes),
+        })
+    if "json array" in prompt.lower():
+        # Batched classification: one "<n>. <notes>" line per item
+        return json.dumps([
+            {"id": int(position), "outcome": stub_responder("Classify. Notes:" + item)}
+            for position, item in re.findall(r"^(\d+)\. (.*)$", notes, re.MULTILINE)
+        ])
+    if "classify" in prompt.lower():
+        if re.search(r"\b(not interested|declined|no interest|rejected)\b"
+                     r"|(\bnot|\bnever|\bno longer|n't)( \w+){0,2} (interested|keen)\b", notes):
+            return "not interested"
+        if re.search(r"\b(follow[- ]?up|call back|send|schedule)\b", notes):
+            return "follow-up needed"
+        return "interested"
+    words = notes.split()
+    return " ".join(words[:40]) or "No notes provided."
+
+
+class StubBackend:
+    """Local stand-in for the LLM provider, used for offline load tests."""
+
+    def __init__(self, latency: float = 0.0, responder=stub_responder):
+        self.latency = latency
+        self.responder = responder
+        self.calls = 0
+
+    async def complete(self, prompt: str, model: str, **kwargs) -> str:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        answer = self.responder(prompt)
+        # Word counts stand in for tokens
+        LLM_TOKENS.inc(len(prompt.split()), type="prompt")
+        LLM_TOKENS.inc(len(answer.split()), type="completion")
+        return answer
+
+    async def stream(self, prompt: str, model: str, **kwargs):
+        """Yield the answer word by word, spreading the latency over the words."""
+        self.calls += 1
+        words = self.responder(prompt).split(" ")
+        LLM_TOKENS.inc(len(prompt.split()), type="prompt")
+        LLM_TOKENS.inc(len(words), type="completion")
+        for i, word in enumerate(words):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(words))
+            yield word if i == 0 else " " + word
+
+    async def aclose(self):
+        pass
+
+
+class LLMClient:
+    """Non-blocking LLM client with a concurrency cap and per-call timeouts."""
+
+    def __init__(self, backend, max_concurrency: int = 8, timeout: float = 30.0):
+        self.backend = backend
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def complete(self, prompt: str, model: str = DEFAULT_MODEL, timeout: float = None, **kwargs) -> str:
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            started = perf_counter()
+            status = "error"
+            try:
+                result = await asyncio.wait_for(self.backend.complete(prompt, model, **kwargs), timeout)
+                status = "ok"
+                return result
+            except asyncio.TimeoutError:
+                status = "timeout"
+                raise LLMError(f"LLM call timed out after {timeout}s")
+            finally:
+                LLM_SECONDS.observe(perf_counter() - started, kind="complete", status=status)
+
+    async def stream(self, prompt: str, model: str = DEFAULT_MODEL, timeout: float = None, **kwargs):
+        """Yield the completion in chunks as they arrive; `timeout` bounds the whole stream."""
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            started = perf_counter()
+            status = "error"
+            deadline = asyncio.get_running_loop().time() + timeout
+            chunks = self.backend.stream(prompt, model, **kwargs)
+            try:
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    try:
+                        yield await asyncio.wait_for(chunks.__anext__(), max(remaining, 0))
+                    except StopAsyncIteration:
+                        status = "ok"
+                        return
+                    except asyncio.TimeoutError:
+                        status = "timeout"
+                        raise LLMError(f"LLM stream timed out after {timeout}s")
+            finally:
+                await chunks.aclose()
+                LLM_SECONDS.observe(perf_counter() - started, kind="stream", status=status)
+
+    async def aclose(self):
+        await self.backend.aclose()
+
+
+# Process-wide client, created on first use or at startup
+llm = None
+
+
+def create_backend():
+    """Build the backend selected by LLM_BACKEND ("groq" or "stub")."""
+    timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+    if os.getenv("LLM_BACKEND", "groq").lower() == "stub":
+        return StubBackend(latency=float(os.getenv("LLM_STUB_LATENCY_MS", "0")) / 1000)
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY is not set (use LLM_BACKEND=stub to run without Groq)")
+    return GroqBackend(
+        api_key=api_key,
+        timeout=timeout,
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        base_url=os.getenv("GROQ_BASE_URL") or None,
+    )
+
+
+def init_llm(backend=None) -> LLMClient:
+    global llm
+    llm = LLMClient(
+        backend or create_backend(),
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+        timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+    )
+    return llm
+
+
+def get_llm() -> LLMClient:
+    if llm is None:
+        init_llm()
+    return llm
+
+
+async def close_llm():
+    global llm
+    if llm is not None:
+        await llm.aclose()
+        llm = None
@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_notes(notes: str) -> str:
+    """Fold case and whitespace so trivially different notes share a cache entry."""
+    return " ".join(notes.split()).casefold()
+
+
+def make_key(model: str, template: str, notes: str) -> str:
+    payload = "\x1f".join((model, template, normalize_notes(notes)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteTier:
+    """Persistent cache tier in a local SQLite file, accessed off the event loop."""
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Shared by every worker process: readers don't block the writer, and
+        # a writer waits for the lock instead of failing with "database is locked"
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout = 5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    def _get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def _set(self, key: str, value: str, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._writes += 1
+            # Prune periodically rather than on every write
+            if self._writes % 100 == 0:
+                self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+            self._conn.commit()
+
+    async def get(self, key: str):
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: float):
+        await asyncio.to_thread(self._set, key, value, ttl)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LLMCache:
+    """Two-tier cache of LLM completions: an in-memory LRU and an optional SQLite file."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400, persistent: SQLiteTier = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persistent = persistent
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.persistent_hits = 0
+        self.evictions = 0
+        self.persistent_errors = 0
+
+    async def get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry[0] >= time.time():
+                self._memory.move_to_end(key)
+                return entry[1]
+            del self._memory[key]
+        if self.persistent is not None:
+            try:
+                value = await self.persistent.get(key)
+            except sqlite3.Error:
+                # Treat an unreadable persistent tier as a miss
+                self.persistent_errors += 1
+                logger.exception("LLM cache: persistent read failed")
+                value = None
+            if value is not None:
+                self.persistent_hits += 1
+                self._remember(key, value)
+                return value
+        return None
+
+    async def set(self, key: str, value: str):
+        """Store a value; a failed persistent write is logged, the memory tier still has it."""
+        self._remember(key, value)
+        if self.persistent is not None:
+            try:
+                await self.persistent.set(key, value, self.ttl)
+            except sqlite3.Error:
+                self.persistent_errors += 1
+                logger.exception("LLM cache: persistent write failed")
+
+    def _remember(self, key: str, value: str):
+        self._memory[key] = (time.time() + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, key: str, compute) -> str:
+        """Return the cached value or await `compute()`; concurrent misses share one call."""
+        value = await self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        if key in self._inflight:
+            self.hits += 1
+            return await asyncio.shield(self._inflight[key])
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        # Callers get the (already paid for) value even if caching it fails
+        future.set_result(value)
+        await self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "persistent_hits": self.persistent_hits,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "persistent": self.persistent is not None,
+            "persistent_errors": self.persistent_errors,
+        }
+
+    def close(self):
+        if self.persistent is not None:
+            self.persistent.close()
+
+
+# Process-wide cache, created on first use or at startup
+cache = None
+
+
+def init_cache() -> LLMCache:
+    global cache
+    path = os.getenv("LLM_CACHE_PATH")
+    persistent = SQLiteTier(path, int(os.getenv("LLM_CACHE_PERSISTENT_MAX", "100000"))) if path else None
+    cache = LLMCache(
+        max_entries=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+        persistent=persistent,
+    )
+    return cache
+
+
+def get_cache() -> LLMCache:
+    if cache is None:
+        init_cache()
+    return cache
+
+
+def close_cache():
+    global cache
+    if cache is not None:
+        cache.close()
+        cache = None
@@ -1,18 +1,45 @@
 import asyncio
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 from langgraph.graph import StateGraph, END
 from langchain_core.tools import tool
-from groq import Groq
-import aiomysql
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any
 import os
 from datetime import datetime
-import re
 import uuid
+from time import perf_counter
+from database import init_pool, close_pool, transaction, PoolTimeout
+from llm import init_llm, close_llm
+from llm_cache import init_cache, close_cache, get_cache
+from metrics import MetricsMiddleware, TOOL_SECONDS, register_gauges, render as render_metrics, timed_tool
+from profiler import profiler
+from sessions import init_sessions, get_sessions, close_sessions, new_session_id, MAX_HISTORY
+from enrichment import enrich, classify, classify_detailed, summarize, stream_summary, get_classify_batcher
+from enrichment_queue import EnrichmentQueue, PENDING, RUNNING
+from extraction import parse_message, detect_intent
+from hcp_directory import init_directory, get_directory
+from search import init_search_index, get_search_index, fulltext_search, fetch_by_ids
+from dedup import DuplicateIndex, init_duplicates, get_duplicates
+import rollups
+from migrations import migrate
+from serialization import format_date, format_time, row_converter, sse_event, FastJSONResponse
+from export import stream_rows, ndjson_chunks, csv_chunks
+from ingest import parse_body, to_params, existing_hcp_ids, insert_rows, get_autoinc_step
 
-app = FastAPI(title="HCP CRM API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+app = FastAPI(title="HCP CRM API", lifespan=lifespan)
 
 # CORS for React frontend
 app.add_middleware(
@@ -21,280 +48,414 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
-
-# Groq client
-groq_client = Groq(
-    api_key=os.getenv("GROQ_API_KEY", "gsk_xEHmkwiawRQtLWGdyb3FYbBi8lqaJCF1tqVLf9uga21dd"),
-    http_client=None
-)
+app.add_middleware(MetricsMiddleware)
 
 # Database pool
 pool = None
 
+# Background enrichment workers, used when enrichment is deferred
+enrichment_queue = None
+
+# Read at scrape time; components that are not initialized yet are skipped
+register_gauges("db_pool", "Database connection pool", lambda: pool.stats())
+register_gauges("llm_cache", "LLM completion cache", lambda: get_cache().stats())
+register_gauges("hcp_directory", "In-memory HCP directory", lambda: get_directory().stats())
+register_gauges("enrichment_queue", "Deferred enrichment queue", lambda: enrichment_queue.stats())
+register_gauges("chat_sessions", "Chat session store", lambda: get_sessions().stats())
+register_gauges("classify_batcher", "Outcome classification micro-batcher", lambda: get_classify_batcher().stats())
+register_gauges("search_index", "In-process full-text index", lambda: get_search_index().stats())
+register_gauges("dedup", "Near-duplicate interaction index", lambda: get_duplicates().stats())
+
 async def init_db():
-    """Initialize MySQL connection pool and create tables."""
+    """Initialize MySQL connection pool and apply schema migrations."""
     global pool
-    pool = await aiomysql.create_pool(
-        host="localhost", port=3306, user="root", password="", db="patient_db",
-        autocommit=True, minsize=1, maxsize=10
-    )
+    pool = await init_pool()
+    await migrate(pool)
+    # Read once the spacing the bulk endpoint computes inserted ids with
+    await get_autoinc_step(pool)
+
+async def set_enrichment(interaction_id: int, summary: str, outcome: str):
+    """Store the enrichment of a claimed row."""
+    async with transaction(pool) as cursor:
+        # Skipped if the notes were edited meanwhile and the row was requeued
+        await rollups.update(
+            cursor, "id = %s AND outcome = %s", (interaction_id, RUNNING),
+            "summary = %s, outcome = %s", (summary, outcome)
+        )
+
+async def release_enrichment(interaction_id: int):
+    """Hand a claimed row back so a retry (or the next startup) can claim it."""
+    async with transaction(pool) as cursor:
+        await rollups.update(cursor, "id = %s AND outcome = %s", (interaction_id, RUNNING), "outcome = %s", (PENDING,))
+
+async def apply_enrichment(interaction_id: int, notes: str):
+    """Enrich a saved interaction and store the result (background worker handler).
+
+    The row's current notes are enriched, not `notes`: an older job for a
+    row whose notes were edited since must not store a stale summary.
+    """
+    async with transaction(pool) as cursor:
+        # Claim the row; another process may already have it
+        await cursor.execute(
+            "SELECT topic_discussed FROM hcp_interactions WHERE id = %s AND outcome = %s FOR UPDATE",
+            (interaction_id, PENDING)
+        )
+        row = await cursor.fetchone()
+        if not row:
+            return
+        notes = row[0] or ""
+        await rollups.update(
+            cursor, "id = %s AND outcome = %s", (interaction_id, PENDING), "outcome = %s", (RUNNING,)
+        )
+    try:
+        enrichment = await enrich(notes)
+    except Exception:
+        await release_enrichment(interaction_id)
+        raise
+    await set_enrichment(interaction_id, enrichment["summary"], enrichment["outcome"])
+
+async def stream_enrichment(interaction_id: int, notes: str, config: RunnableConfig) -> Dict[str, str]:
+    """Enrich a claimed row, emitting summary chunks and then the outcome as graph events.
+
+    If the stream fails or the client goes away, the row is handed to the
+    background workers instead.
+    """
+    outcome_task = asyncio.create_task(classify(notes))
+    try:
+        chunks = []
+        async for chunk in stream_summary(notes):
+            chunks.append(chunk)
+            await emit(config, "summary", {"token": chunk})
+        summary = "".join(chunks).strip()
+        outcome = await outcome_task
+    except BaseException:
+        outcome_task.cancel()
+        await release_enrichment(interaction_id)
+        await enrichment_queue.submit(interaction_id, notes)
+        raise
+    await emit(config, "outcome", {"outcome": outcome})
+    await set_enrichment(interaction_id, summary, outcome)
+    return {"summary": summary, "outcome": outcome}
+
+async def requeue_stale_enrichment():
+    """Requeue pending rows this process isn't working on (enrichment queue sweep).
+
+    Rows claimed longer than ENRICHMENT_CLAIM_TIMEOUT seconds ago belong to
+    a process that died mid-job and are made pending again first.
+    """
+    async with transaction(pool) as cursor:
+        await rollups.update(
+            cursor, "outcome = %s AND updated_at < NOW() - INTERVAL %s SECOND",
+            (RUNNING, int(os.getenv("ENRICHMENT_CLAIM_TIMEOUT", "600"))),
+            "outcome = %s", (PENDING,)
+        )
     async with pool.acquire() as conn:
         async with conn.cursor() as cursor:
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS hcp_interactions (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    hcp_id VARCHAR(36) NOT NULL,
-                    interaction_type VARCHAR(50),
-                    date DATE,
-                    time TIME,
-                    attendees TEXT,
-                    topic_discussed TEXT,
-                    materials_shared TEXT,
-                    hcp_sentiment VARCHAR(20),
-                    outcomes TEXT,
-                    follow_up_action TEXT,
-                    summary TEXT,
-                    outcome VARCHAR(50)
-                )
-            """)
-            await cursor.execute("""
-                CREATE TABLE IF NOT EXISTS hcp_profiles (
-                    hcp_id VARCHAR(36) PRIMARY KEY,
-                    name VARCHAR(100),
-                    specialty VARCHAR(100)
-                )
-            """)
-            await conn.commit()
+            await cursor.execute(
+                "SELECT id, topic_discussed FROM hcp_interactions WHERE outcome = %s", (PENDING,)
+            )
+            rows = await cursor.fetchall()
+    for interaction_id, notes in rows:
+        if not enrichment_queue.is_active(interaction_id):
+            await enrichment_queue.submit(interaction_id, notes or "")
+
+async def start_enrichment_queue():
+    """Start the enrichment workers; the sweep requeues rows left by a previous run or a dead worker."""
+    global enrichment_queue
+    enrichment_queue = EnrichmentQueue(
+        apply_enrichment,
+        workers=int(os.getenv("ENRICHMENT_WORKERS", "4")),
+        max_retries=int(os.getenv("ENRICHMENT_MAX_RETRIES", "3")),
+        backoff=float(os.getenv("ENRICHMENT_RETRY_BACKOFF", "0.5")),
+        sweep=requeue_stale_enrichment,
+        sweep_interval=float(os.getenv("ENRICHMENT_SWEEP_INTERVAL", "60")),
+    )
+    enrichment_queue.start()
 
 @tool
+@timed_tool
 async def log_interaction(
     hcp_id: str,
-    interaction_type: str = None,
-    date: str = None,
-    time: str = None,
-    attendees: str = None,
-    topic_discussed: str = None,
-    materials_shared: str = None,
-    hcp_sentiment: str = None,
-    outcomes: str = None,
-    follow_up_action: str = None
+    interaction_type: str | None = None,
+    date: str | None = None,
+    time: str | None = None,
+    attendees: str | None = None,
+    topic_discussed: str | None = None,
+    materials_shared: str | None = None,
+    hcp_sentiment: str | None = None,
+    outcomes: str | None = None,
+    follow_up_action: str | None = None,
+    defer_enrichment: bool | None = None
 ) -> Dict[str, Any]:
-    """Log an HCP interaction with summarization and outcome classification."""
+    """Log an HCP interaction with summarization and outcome classification.
+
+    With defer_enrichment (default: ENRICHMENT_DEFERRED) the row is saved with
+    a pending outcome and summarized later by the background workers.
+    """
+    if defer_enrichment is None:
+        defer_enrichment = os.getenv("ENRICHMENT_DEFERRED", "0") == "1"
+    return await save_interaction({
+        "hcp_id": hcp_id,
+        "interaction_type": interaction_type,
+        "date": date,
+        "time": time,
+        "attendees": attendees,
+        "topic_discussed": topic_discussed,
+        "materials_shared": materials_shared,
+        "hcp_sentiment": hcp_sentiment,
+        "outcomes": outcomes,
+        "follow_up_action": follow_up_action
+    }, "deferred" if defer_enrichment else "inline")
+
+async def save_interaction(fields: Dict[str, Any], enrichment: str = "inline") -> Dict[str, Any]:
+    """Validate and insert a new interaction.
+
+    `enrichment` is "inline" (summary and outcome computed before the
+    INSERT), "deferred" (pending row handed to the background workers) or
+    "claimed" (running row the caller enriches itself, see stream_enrichment).
+    Notes-free interactions are always saved without enrichment. A
+    near-duplicate of a recent interaction (same HCP and date, see dedup.py)
+    is reported in "duplicate_of", or refused before enrichment when
+    DEDUP_MODE=skip.
+    """
     try:
         # Validate date and time if provided
-        date_obj = datetime.strptime(date, '%Y-%m-%d').date() if date else None
-        time_obj = datetime.strptime(time, '%H:%M:%S').time() if time else None
-        async with pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                # Validate HCP exists
-                await cursor.execute("SELECT hcp_id, name FROM hcp_profiles WHERE hcp_id = %s", (hcp_id,))
-                hcp = await cursor.fetchone()
-                if not hcp:
-                    return {"error": f"HCP ID {hcp_id} not found"}
-                # Summarize notes (topic_discussed as notes)
-                notes = topic_discussed or ""
-                summary = ""
-                outcome = ""
-                if notes:
-                    # Use a more analytical prompt for summary
-                    response = groq_client.chat.completions.create(
-                        model="gemma2-9b-it",
-                        messages=[{
-                            "role": "user",
-                            "content": (
-                                "Analyze the following meeting notes and provide a concise, factual summary. "
-                                "Focus on key discussion points, decisions made, concerns raised, and any action items. "
-                                "Avoid generic or instructional responses. Notes:\n" + interaction_type + notes + topic_discussed
-                            )
-                        }]
-                    )
-                    summary = response.choices[0].message.content.strip()
-                    # Classify outcome
-                    outcome_response = groq_client.chat.completions.create(
-                        model="gemma2-9b-it",
-                        messages=[{
-                            "role": "user",
-                            "content": (
-                                "Based on these notes, classify the outcome as 'interested', 'not interested', or 'follow-up needed'. "
-                                "Only return one of these three labels. Notes:\n" + notes 
-                            )
-                        }]
-                    )
-                    outcome = outcome_response.choices[0].message.content.strip()
-                    # Truncate outcome to fit the VARCHAR(50) column
-                    outcome = outcome[:50]
-                await cursor.execute(
-                    """
-                    INSERT INTO hcp_interactions (
-                        hcp_id, interaction_type, date, time, attendees, topic_discussed,
-                        materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                    (hcp_id, interaction_type, date_obj, time_obj, attendees, topic_discussed,
-                     materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome)
-                )
-                await conn.commit()
-                return {
-                    "id": cursor.lastrowid,
-                    "hcp_id": hcp_id,
-                    "interaction_type": interaction_type,
-                    "date": date,
-                    "time": time,
-                    "attendees": attendees,
-                    "topic_discussed": topic_discussed,
-                    "materials_shared": materials_shared,
-                    "hcp_sentiment": hcp_sentiment,
-                    "outcomes": outcomes,
-                    "follow_up_action": follow_up_action,
-                    "summary": summary,
-                    "outcome": outcome
-                }
+        date_obj = datetime.strptime(fields["date"], '%Y-%m-%d').date() if fields["date"] else None
+        time_obj = datetime.strptime(fields["time"], '%H:%M:%S').time() if fields["time"] else None
+        # Validate HCP exists
+        if not await get_directory().get(pool, fields["hcp_id"]):
+            return {"error": f"HCP ID {fields['hcp_id']} not found"}
+        notes = fields["topic_discussed"]
+        duplicates = get_duplicates()
+        duplicate_of = await duplicates.check(pool, fields["hcp_id"], fields["date"], notes) if notes else None
+        if duplicate_of is not None and duplicates.mode == "skip":
+            return {"error": f"Near-duplicate of interaction {duplicate_of}", "duplicate_of": duplicate_of}
+        if notes and enrichment == "deferred":
+            summary, outcome = None, PENDING
+        elif notes and enrichment == "claimed":
+            summary, outcome = None, RUNNING
+        else:
+            # Summarize notes (topic_discussed as notes)
+            result = await enrich(notes or "")
+            summary, outcome = result["summary"], result["outcome"]
+        async with transaction(pool) as cursor:
+            await cursor.execute(
+                """
+                INSERT INTO hcp_interactions (
+                    hcp_id, interaction_type, date, time, attendees, topic_discussed,
+                    materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """,
+                (fields["hcp_id"], fields["interaction_type"], date_obj, time_obj, fields["attendees"],
+                 notes, fields["materials_shared"], fields["hcp_sentiment"], fields["outcomes"],
+                 fields["follow_up_action"], summary, outcome)
+            )
+            interaction_id = cursor.lastrowid
+            await rollups.add(cursor, "id = %s", (interaction_id,))
+        get_search_index().put({"id": interaction_id, **fields, "summary": summary})
+        duplicates.add(interaction_id, fields["hcp_id"], fields["date"], notes)
+        if outcome == PENDING:
+            await enrichment_queue.submit(interaction_id, notes)
+        return {"id": interaction_id, **fields, "summary": summary, "outcome": outcome, "duplicate_of": duplicate_of}
     except ValueError as e:
         return {"error": f"Invalid date or time format: {str(e)}"}
     except Exception as e:
         return {"error": str(e)}
 
+# Columns edit_interaction may change, in table order
+EDITABLE_FIELDS = (
+    "hcp_id", "interaction_type", "date", "time", "attendees", "topic_discussed",
+    "materials_shared", "hcp_sentiment", "outcomes", "follow_up_action"
+)
+
 @tool
+@timed_tool
 async def edit_interaction(
     interaction_id: int,
-    hcp_id: str,
-    interaction_type: str = None,
-    date: str = None,
-    time: str = None,
-    attendees: str = None,
-    topic_discussed: str = None,
-    materials_shared: str = None,
-    hcp_sentiment: str = None,
-    outcomes: str = None,
-    follow_up_action: str = None
+    hcp_id: str | None = None,
+    interaction_type: str | None = None,
+    date: str | None = None,
+    time: str | None = None,
+    attendees: str | None = None,
+    topic_discussed: str | None = None,
+    materials_shared: str | None = None,
+    hcp_sentiment: str | None = None,
+    outcomes: str | None = None,
+    follow_up_action: str | None = None,
+    defer_enrichment: bool | None = None
 ) -> Dict[str, Any]:
-    """Edit an existing HCP interaction with updated summarization and outcome."""
+    """Edit an existing HCP interaction, updating only the fields that changed.
+
+    Fields left as None keep their stored value, and "" counts as equal to
+    a NULL column. Summary and outcome are regenerated only when the notes
+    (topic_discussed) actually change, and cleared along with the notes.
+    """
     try:
         date_obj = datetime.strptime(date, '%Y-%m-%d').date() if date else None
         time_obj = datetime.strptime(time, '%H:%M:%S').time() if time else None
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute("SELECT hcp_id FROM hcp_profiles WHERE hcp_id = %s", (hcp_id,))
-                if not await cursor.fetchone():
-                    return {"error": f"HCP ID {hcp_id} not found"}
-                notes = topic_discussed or ""
-                summary = ""
-                outcome = ""
-                if notes:
-                    response = groq_client.chat.completions.create(
-                        model="gemma2-9b-it",
-                        messages=[{"role": "user", "content": f"Summarize: {notes}"}]
-                    )
-                    summary = response.choices[0].message.content
-                    outcome_response = groq_client.chat.completions.create(
-                        model="gemma2-9b-it",
-                        messages=[{"role": "user", "content": f"Classify outcome: {notes}"}]
-                    )
-                    outcome = outcome_response.choices[0].message.content
-                    # Truncate outcome to fit the VARCHAR(50) column
-                    outcome = outcome[:50]
                 await cursor.execute(
                     """
-                    UPDATE hcp_interactions SET
-                        hcp_id = %s, interaction_type = %s, date = %s, time = %s, attendees = %s,
-                        topic_discussed = %s, materials_shared = %s, hcp_sentiment = %s,
-                        outcomes = %s, follow_up_action = %s, summary = %s, outcome = %s
-                    WHERE id = %s
+                    SELECT hcp_id, interaction_type, date, time, attendees, topic_discussed,
+                           materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome
+                    FROM hcp_interactions WHERE id = %s
                     """,
-                    (hcp_id, interaction_type, date_obj, time_obj, attendees, topic_discussed,
-                     materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome, interaction_id)
+                    (interaction_id,)
                 )
-                await conn.commit()
-                if cursor.rowcount == 0:
-                    return {"error": "Interaction not found"}
-                return {
-                    "id": interaction_id,
-                    "hcp_id": hcp_id,
-                    "interaction_type": interaction_type,
-                    "date": date,
-                    "time": time,
-                    "attendees": attendees,
-                    "topic_discussed": topic_discussed,
-                    "materials_shared": materials_shared,
-                    "hcp_sentiment": hcp_sentiment,
-                    "outcomes": outcomes,
-                    "follow_up_action": follow_up_action,
-                    "summary": summary,
-                    "outcome": outcome
-                }
+                row = await cursor.fetchone()
+        if not row:
+            return {"error": "Interaction not found"}
+        current = dict(zip(EDITABLE_FIELDS + ("summary", "outcome"), row))
+        current["date"] = format_date(current["date"])
+        current["time"] = format_time(current["time"])
+
+        requested = {
+            "hcp_id": hcp_id, "interaction_type": interaction_type,
+            "date": date_obj and date, "time": time_obj and time,
+            "attendees": attendees, "topic_discussed": topic_discussed,
+            "materials_shared": materials_shared, "hcp_sentiment": hcp_sentiment,
+            "outcomes": outcomes, "follow_up_action": follow_up_action
+        }
+        # The chat form sends "" for blank fields; don't turn NULLs into ""
+        changes = {
+            field: value for field, value in requested.items()
+            if value is not None and (value or None) != (current[field] or None)
+        }
+        if not changes:
+            return {"id": interaction_id, **current}
+
+        if "hcp_id" in changes and not await get_directory().get(pool, hcp_id):
+            return {"error": f"HCP ID {hcp_id} not found"}
+
+        defer = False
+        notes = changes.get("topic_discussed")
+        if notes:
+            if defer_enrichment is None:
+                defer_enrichment = os.getenv("ENRICHMENT_DEFERRED", "0") == "1"
+            defer = bool(defer_enrichment)
+            if defer:
+                enrichment = {"summary": None, "outcome": PENDING}
+            else:
+                enrichment = await enrich(notes)
+            changes.update(enrichment)
+        elif "topic_discussed" in changes:
+            # Notes cleared: drop the summary and outcome of the old notes
+            changes.update(await enrich(""))
+
+        values = {**changes}
+        if "date" in values:
+            values["date"] = date_obj
+        if "time" in values:
+            values["time"] = time_obj
+        assignments = ", ".join(f"{field} = %s" for field in values)
+        async with transaction(pool) as cursor:
+            if rollups.ROLLUP_FIELDS.isdisjoint(values):
+                await cursor.execute(
+                    f"UPDATE hcp_interactions SET {assignments} WHERE id = %s",
+                    (*values.values(), interaction_id)
+                )
+            else:
+                await rollups.update(cursor, "id = %s", (interaction_id,), assignments, values.values())
+        get_search_index().put({"id": interaction_id, **current, **changes})
+        if not changes.keys().isdisjoint(("hcp_id", "date", "topic_discussed")):
+            updated = {**current, **changes}
+            get_duplicates().add(interaction_id, updated["hcp_id"], updated["date"], updated["topic_discussed"])
+        if defer:
+            await enrichment_queue.submit(interaction_id, notes)
+        return {"id": interaction_id, **current, **changes}
     except ValueError as e:
         return {"error": f"Invalid date or time format: {str(e)}"}
     except Exception as e:
         return {"error": str(e)}
 
 @tool
+@timed_tool
 async def delete_interaction(interaction_id: int) -> Dict[str, Any]:
     """Delete an HCP interaction by ID."""
     try:
-        async with pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                await cursor.execute("DELETE FROM hcp_interactions WHERE id = %s", (interaction_id,))
-                await conn.commit()
-                if cursor.rowcount == 0:
-                    return {"error": "Interaction not found"}
-                return {"success": f"Interaction {interaction_id} deleted"}
+        async with transaction(pool) as cursor:
+            deleted = await rollups.delete(cursor, "id = %s", (interaction_id,))
+        if deleted == 0:
+            return {"error": "Interaction not found"}
+        get_search_index().remove(interaction_id)
+        get_duplicates().remove(interaction_id)
+        return {"success": f"Interaction {interaction_id} deleted"}
     except Exception as e:
         return {"error": str(e)}
 
 @tool
-async def validate_or_create_hcp(hcp_name: str = None, hcp_id: str = None, specialty: str = None) -> Dict[str, Any]:
+@timed_tool
+async def validate_or_create_hcp(hcp_name: str | None = None, hcp_id: str | None = None, specialty: str | None = None) -> Dict[str, Any]:
     """Validate an HCP ID or create/update an HCP profile."""
     try:
+        directory = get_directory()
+        profile = await directory.get(pool, hcp_id) if hcp_id else None
+        if not profile and hcp_name:
+            # Check if HCP exists by name
+            profile = await directory.find_by_name(pool, hcp_name)
+        if not profile and not hcp_name:
+            return {"error": "HCP name or ID required"}
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
-                if hcp_id:
-                    await cursor.execute("SELECT hcp_id, name, specialty FROM hcp_profiles WHERE hcp_id = %s", (hcp_id,))
-                    row = await cursor.fetchone()
-                    if row:
-                        # Update if new details provided
-                        if specialty and specialty != row[2]:
-                            await cursor.execute(
-                                "UPDATE hcp_profiles SET specialty = %s WHERE hcp_id = %s",
-                                (specialty, hcp_id)
-                            )
-                            await conn.commit()
-                        return {"hcp_id": row[0], "name": row[1], "specialty": specialty or row[2]}
-                if hcp_name:
-                    # Check if HCP exists by name
-                    await cursor.execute("SELECT hcp_id, name, specialty FROM hcp_profiles WHERE name = %s", (hcp_name,))
-                    row = await cursor.fetchone()
-                    if row:
-                        # Update if new details provided
-                        if specialty and specialty != row[2]:
-                            await cursor.execute(
-                                "UPDATE hcp_profiles SET specialty = %s WHERE hcp_id = %s",
-                                (specialty, row[0])
-                            )
-                            await conn.commit()
-                        return {"hcp_id": row[0], "name": row[1], "specialty": specialty or row[2]}
-                    # Create new HCP
-                    new_hcp_id = str(uuid.uuid4())
-                    await cursor.execute(
-                        "INSERT INTO hcp_profiles (hcp_id, name, specialty) VALUES (%s, %s, %s)",
-                        (new_hcp_id, hcp_name, specialty)
-                    )
-                    await conn.commit()
-                    return {"hcp_id": new_hcp_id, "name": hcp_name, "specialty": specialty}
-                return {"error": "HCP name or ID required"}
+                if profile:
+                    # Update if new details provided
+                    if specialty and specialty != profile["specialty"]:
+                        await cursor.execute(
+                            "UPDATE hcp_profiles SET specialty = %s WHERE hcp_id = %s",
+                            (specialty, profile["hcp_id"])
+                        )
+                        await conn.commit()
+                        profile = {**profile, "specialty": specialty}
+                        directory.put(profile)
+                    return profile
+                # Create new HCP
+                new_hcp_id = str(uuid.uuid4())
+                await cursor.execute(
+                    "INSERT INTO hcp_profiles (hcp_id, name, specialty) VALUES (%s, %s, %s)",
+                    (new_hcp_id, hcp_name, specialty)
+                )
+                await conn.commit()
+                profile = {"hcp_id": new_hcp_id, "name": hcp_name, "specialty": specialty}
+                directory.put(profile)
+                return profile
     except Exception as e:
         return {"error": str(e)}
 
+@timed_tool
+async def resolve_hcp(hcp_id: str = None, hcp_name: str = None, specialty: str = None,
+                      create: bool = False) -> Dict[str, Any]:
+    """Resolve an HCP from the cached directory; create or update the profile only if `create` is set."""
+    try:
+        profile = await get_directory().lookup(pool, hcp_id=hcp_id, name=hcp_name)
+    except Exception as e:
+        return {"error": str(e)}
+    if create and (not profile or (specialty and specialty != profile["specialty"])):
+        return await validate_or_create_hcp.ainvoke({"hcp_name": hcp_name, "hcp_id": hcp_id, "specialty": specialty})
+    if not (hcp_id or hcp_name):
+        return {"error": "HCP name or ID required"}
+    if not profile:
+        return {"error": f"HCP {hcp_id or hcp_name} not found"}
+    return profile
+
+LATEST_COLUMNS = (
+    "id", "hcp_id", "interaction_type", "date", "time", "attendees", "topic_discussed",
+    "materials_shared", "hcp_sentiment", "outcomes", "follow_up_action", "summary", "outcome"
+)
+latest_row = row_converter(LATEST_COLUMNS, {"id": "interaction_id"})
+
 @tool
+@timed_tool
 async def fetch_latest_interaction(hcp_id: str) -> Dict[str, Any]:
     """Fetch the latest interaction for a given HCP ID."""
     try:
         async with pool.acquire() as conn:
             async with conn.cursor() as cursor:
                 await cursor.execute(
-                    """
-                    SELECT id, hcp_id, interaction_type, date, time, attendees, topic_discussed,
-                           materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome
+                    f"""
+                    SELECT {', '.join(LATEST_COLUMNS)}
                     FROM hcp_interactions
                     WHERE hcp_id = %s
                     ORDER BY date DESC, time DESC
@@ -305,162 +466,32 @@ async def fetch_latest_interaction(hcp_id: str) -> Dict[str, Any]:
                 row = await cursor.fetchone()
                 if not row:
                     return {"error": f"No interactions found for HCP ID {hcp_id}"}
-                return {
-                    "interaction_id": row[0],
-                    "hcp_id": row[1],
-                    "interaction_type": row[2],
-                    "date": row[3].strftime('%Y-%m-%d') if row[3] else None,
-                    "time": (
-                        f"{row[4].seconds//3600:02}:{(row[4].seconds//60)%60:02}:{row[4].seconds%60:02}"
-                        if row[4] else None
-                    ),
-                    "attendees": row[5],
-                    "topic_discussed": row[6],
-                    "materials_shared": row[7],
-                    "hcp_sentiment": row[8],
-                    "outcomes": row[9],
-                    "follow_up_action": row[10],
-                    "summary": row[11],
-                    "outcome": row[12]
-                }
+                return latest_row(row)
     except Exception as e:
         return {"error": str(e)}
 
 @tool
+@timed_tool
 async def get_product_info(product_name: str) -> Dict[str, Any]:
     """Retrieve product information for reference during interactions."""
     return {"product_name": product_name, "details": "Info about product"}
 
 @tool
+@timed_tool
 async def classify_outcome(notes: str) -> Dict[str, Any]:
     """Classify the outcome of an interaction based on notes."""
     try:
-        response = groq_client.chat.completions.create(
-            model="gemma2-9b-it",
-            messages=[{"role": "user", "content": f"Classify outcome as 'interested', 'not interested', or 'follow-up needed': {notes}"}]
-        )
-        return {"outcome": response.choices[0].message.content}
+        outcome, confidence, source = await classify_detailed(notes)
+        return {"outcome": outcome, "confidence": confidence, "source": source}
     except Exception as e:
         return {"error": str(e)}
 
 @tool
+@timed_tool
 async def extract_entities(text: str) -> Dict[str, Any]:
-    """Extract entities from chat input."""
+    """Extract entities from chat input. Pure parsing: no database access."""
     try:
-        # Detect fetch/retrieve/update command
-        fetch_command_match = re.search(r'\b(retrieve|fetch|update|replace)\b', text, re.IGNORECASE)
-        is_fetch_command = bool(fetch_command_match)
-        command = fetch_command_match.group(0).lower() if fetch_command_match else None
-
-        # Extract HCP name for fetch commands (e.g., "retrieve dr.davis")
-        hcp_name_for_fetch_match = re.search(r'(?:retrieve|fetch|update|replace)\s+dr\.?\s*(\w+)', text, re.IGNORECASE)
-        hcp_name_for_fetch = hcp_name_for_fetch_match.group(1).strip() if hcp_name_for_fetch_match else None
-
-        # Extract field to update (e.g., "HCP Sentiment to positive")
-        update_field_match = re.search(r'(HCP\s+Specialty|HCP\s+Sentiment|interaction\s+type|date|time|meeting|attendees|topic|materials|outcomes|follow-up|follow-up\s+action)\s+to\s+(.+?)(?:$|\s+and\s+|$)', text, re.IGNORECASE)
-        update_field = None
-        update_value = None
-        if update_field_match:
-            field_name = update_field_match.group(1).lower().replace(" ", "_")
-            update_value = update_field_match.group(2).strip()
-            # Map field name to state key
-            field_mapping = {
-                "hcp_specialty": "specialty",
-                "hcp_sentiment": "hcp_sentiment",
-                "interaction_type": "interaction_type",
-                "date": "date",
-                "time": "time",
-                "meeting": "meeting",
-                "attendees": "attendees",
-                "topic": "topic_discussed",
-                "materials": "materials_shared",
-                "outcomes": "outcomes",
-                "follow_up": "follow_up_action",
-                "follow_up_action": "follow_up_action"
-            }
-            update_field = field_mapping.get(field_name)
-
-        # Extract HCP name for "met" commands (e.g., "met dr.davis")
-        hcp_name_match = re.search(r'(?:met)\s+dr\.?\s*(\w+)', text, re.IGNORECASE)
-        hcp_name = hcp_name_match.group(1).strip() if hcp_name_match else hcp_name_for_fetch
-
-        # Extract HCP ID (e.g., "HCP 123")
-        hcp_id_match = re.search(r'HCP\s*(\d+)', text, re.IGNORECASE)
-        hcp_id = hcp_id_match.group(1) if hcp_id_match else None
-
-        # Extract specialty (e.g., "specialty: cardiologist")
-        specialty_match = re.search(r'(?:specialty|HCP Specialty):\s*(\w+)', text, re.IGNORECASE)
-        specialty = specialty_match.group(1).strip() if specialty_match else None
-
-        # Validate or create HCP
-        hcp_result = await validate_or_create_hcp.ainvoke({"hcp_name": hcp_name, "hcp_id": hcp_id, "specialty": specialty})
-        if "error" in hcp_result:
-            return {"error": hcp_id}
-
-        hcp_id = hcp_result["hcp_id"]
-        hcp_name = hcp_result["name"]
-        hcp_specialty = hcp_result.get("outcomes", "")
-
-        # Extract interaction type (e.g., "call")
-        interaction_type_match = re.search(r'\b(meeting|call|email|attendance)\b', text, re.IGNORECASE)
-        interaction_type = interaction_type_match.group(0) if interaction_type_match else "meeting"
-
-        # Extract date
-        # e.g., "2025-06-05" or "today"
-        date_match_exact = re.search(r'\b(\d{4}-\d{2}-d{2})\b', text)
-        date_match_today = re.search(r'\btoday\b', text, re.IGNORECASE)
-        date = date_match_exact.group(1) if date_match_exact else datetime.now().strftime('%Y-%m-%d') if date_match_today else None
-
-        # Extract time
-        # e.g., "09:30")
-        time_match = re.search(r'\b(\d{2}:\d{2}(?::\ d{2})?)\b', text)
-        time = (time_match.group(1) + ":00" if time_match and len(time_match.group(1).split(":")) == 2 else time_match.group(1) if time_match else None)
-
-        # Extract attendees
-        attendees_match = re.search(r'attendees:\s*(.+?)(?:\s*(?:meeting|call|email|attendance|date|time|topic|material|material|sentiment| outcomes| outcomes| out|follow-up|$))', text, re.IGNORECASE)
-        attendees = attendees_match.group(1).strip() if attendees_match else None
-
-        # Extract topic discussed
-        # e.g., "discussed product Z pricing")
-        topic_match = re.search(r'(?:discussed|topic:)\s*(.+?)(?:\s*(?:meeting|call|attendance|date|time|attendees|material|sentiment| outcomes| outcomes| out|follow-up|$))', text, re.IGNORECASE)
-        topic_discussed = topic_match.group(1).strip() if topic_match else None
-
-        # Extract materials shared
-        # e.g., "shared brochure")
-        materials_match = re.search(r'(?:shared|material:):s*(.+?)(?:\s*(?:meeting| meeting|material|meeting| material|material| material| time|| out| out|follow-up|$))', text, re.IGNORECASE)
-        materials_shared = materials_match.group(1).strip() if materials_match else None
-
-        # Extract sentiment
-        # e.g., "neutral sentiment" - only if not part of update command)
-        sentiment_match = re.search(r'(positive|neutral|negative)\s*sentiment', text, re.IGNORECASE)
-        hcp_sentiment = sentiment_match.group(1).lower() if sentiment_match and not update_field else None
-
-        # Extract outcomes
-        outcomes_match = re.search(r'outcomes:\s*(.+?)(?:\s*(?:meeting|call|email|attendance|date|time|attendees|topic|material|sentiment|follow-up|$))', text, re.IGNORECASE)
-        outcomes = outcomes_match.group(1).strip() if outcomes_match else None
-
-        # Extract follow-up action
-        follow_up_match = re.search(r'(?:follow-up|follow up action:)\s*(.+?)(?:\s*(?:meeting|call|email|attendance|date|time|attendees|topic|material|sentiment|outcomes|$))', text, re.IGNORECASE)
-        follow_up_action = follow_up_match.group(1).strip() if follow_up_match else None
-
-        return {
-            "is_fetch_command": is_fetch_command,
-            "command": command,
-            "update_field": update_field,
-            "update_value": update_value,
-            "hcp_id": hcp_id,
-            "hcp_name": hcp_name,
-            "specialty": hcp_specialty,
-            "interaction_type": interaction_type,
-            "date": date,
-            "time": time,
-            "attendees": attendees,
-            "topic_discussed": topic_discussed,
-            "materials_shared": materials_shared,
-            "hcp_sentiment": hcp_sentiment,
-            "outcomes": outcomes,
-            "follow_up_action": follow_up_action
-        }
+        return parse_message(text)
     except Exception as e:
         return {"error": f"Failed to parse input: {str(e)}. Please use the format: 'retrieve dr.<name> HCP Sentiment to positive' or 'met dr.<name>, discussed <topic>, <sentiment> sentiment, shared <materials>'"}
 
@@ -481,191 +512,207 @@ class InteractionState(BaseModel):
     follow_up_action: str = ""
     interaction_id: int = 0
 
+class RoutedState(InteractionState):
+    """Graph state: the form plus the intent picked by the router node."""
+    intent: str = ""
+
+# Form fields a chat message can fill in (interaction_id is managed by the nodes)
+MESSAGE_FIELDS = (
+    "hcp_id", "hcp_name", "specialty", "interaction_type", "date", "time", "attendees", "topic_discussed",
+    "materials_shared", "hcp_sentiment", "outcomes", "follow_up_action"
+)
+
+# Allowed values for "<field> to <value>" updates of enumerated fields
+UPDATE_CHOICES = {
+    "hcp_sentiment": ("positive", "neutral", "negative"),
+    "interaction_type": ("meeting", "call", "email", "visit"),
+}
+
 # LangGraph Workflow
+def is_streaming(config: RunnableConfig) -> bool:
+    return bool(config and config.get("configurable", {}).get("stream"))
+
+async def emit(config: RunnableConfig, name: str, data: Dict[str, Any]):
+    """Send a custom event to /chat/stream clients; a no-op in plain /chat runs."""
+    if is_streaming(config):
+        await adispatch_custom_event(name, data, config=config)
+
+def reply(state: InteractionState, content: str, **updates) -> Dict[str, Any]:
+    """State update appending an assistant message; only fields whose value changes are written."""
+    changed = {field: value for field, value in updates.items() if getattr(state, field) != value}
+    return {"messages": state.messages + [{"role": "assistant", "content": content}], **changed}
+
+def saved(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Form fields of a saved interaction, so the next "save" edits it instead of creating another."""
+    return {"interaction_id": result["id"], **{field: result[field] or "" for field in EDITABLE_FIELDS}}
+
+def message_form(state: InteractionState) -> tuple:
+    """Parse the last message into (entities, form); its values take precedence over the form state."""
+    with TOOL_SECONDS.time(tool="parse_message"):
+        entities = parse_message(state.messages[-1]["content"].lower())
+    form = {field: entities[field] or getattr(state, field) for field in MESSAGE_FIELDS}
+    # Default only a type neither this message nor an earlier one has set
+    form["interaction_type"] = form["interaction_type"] or "meeting"
+    if entities["hcp_id"] or entities["hcp_name"]:
+        form["hcp_id"] = entities["hcp_id"] or ""
+        form["hcp_name"] = entities["hcp_name"] or ""
+    return entities, form
+
+def apply_update(form: Dict[str, Any], field: str, value: str):
+    """Apply a "<field> to <value>" update, ignoring values that are not valid for the field."""
+    if field in UPDATE_CHOICES:
+        if value.lower() in UPDATE_CHOICES[field]:
+            form[field] = value.lower()
+    elif field == "date":
+        try:
+            datetime.strptime(value, '%Y-%m-%d')
+            form["date"] = value
+        except ValueError:
+            pass
+    elif field == "time":
+        form["time"] = value + ":00" if len(value.split(":")) == 2 else value
+    elif field in MESSAGE_FIELDS:
+        form[field] = value
+
+def form_text(form: Dict[str, Any]) -> str:
+    return (
+        f"Interaction Type: {form['interaction_type'] or 'Not specified'}, Date: {form['date'] or 'Not specified'}, "
+        f"Time: {form['time'] or 'Not specified'}, Attendees: {form['attendees'] or 'Not specified'}, "
+        f"Topic: {form['topic_discussed'] or 'Not specified'}, Materials: {form['materials_shared'] or 'Not specified'}, "
+        f"Sentiment: {form['hcp_sentiment'] or 'Not specified'}, Outcomes: {form['outcomes'] or 'Not specified'}, "
+        f"Follow-Up: {form['follow_up_action'] or 'Not specified'}"
+    )
+
+def tool_args(form: Dict[str, Any]) -> Dict[str, Any]:
+    """Tool arguments for saving the form."""
+    return {field: form[field] for field in EDITABLE_FIELDS}
+
 def create_workflow():
-    workflow = StateGraph(InteractionState)
-    
-    async def process_interaction(state: InteractionState) -> InteractionState:
-        last_message = state.messages[-1]["content"].lower()
-        entities = await extract_entities.ainvoke(last_message)
-        if "error" in entities:
-            return InteractionState(messages=state.messages + [{"role": "assistant", "content": entities["error"]}])
-        
-        # Default values from extracted entities
-        hcp_id = entities.get("hcp_id", state.hcp_id) or ""
-        hcp_name = entities.get("hcp_name", state.hcp_name) or ""
-        specialty = entities.get("specialty", state.specialty) or ""
-        interaction_type = entities.get("interaction_type", state.interaction_type) or ""
-        date = entities.get("date", state.date) or ""
-        time = entities.get("time", state.time) or ""
-        attendees = entities.get("attendees", state.attendees) or ""
-        topic_discussed = entities.get("topic_discussed", state.topic_discussed) or ""
-        materials_shared = entities.get("materials_shared", state.materials_shared) or ""
-        hcp_sentiment = entities.get("hcp_sentiment", state.hcp_sentiment) or ""
-        outcomes = entities.get("outcomes", state.outcomes) or ""
-        follow_up_action = entities.get("follow_up_action", state.follow_up_action) or ""
-        interaction_id = state.interaction_id
-
-        # Handle fetch/retrieve/update commands
-        if entities.get("is_fetch_command"):
-            # Fetch the latest interaction for the HCP
-            interaction_data = await fetch_latest_interaction.ainvoke(hcp_id)
-            if "error" in interaction_data:
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": interaction_data["error"]}])
-            
-            # Update state with the latest interaction data
-            interaction_id = interaction_data["interaction_id"]
-            hcp_id = interaction_data["hcp_id"]
-            interaction_type = interaction_data["interaction_type"] or ""
-            date = interaction_data["date"] or ""
-            time = interaction_data["time"] or ""
-            attendees = interaction_data["attendees"] or ""
-            topic_discussed = interaction_data["topic_discussed"] or ""
-            materials_shared = interaction_data["materials_shared"] or ""
-            hcp_sentiment = interaction_data["hcp_sentiment"] or ""
-            outcomes = interaction_data["outcomes"] or ""
-            follow_up_action = interaction_data["follow_up_action"] or ""
-
-            # Apply the update if specified (e.g., "HCP Sentiment to positive")
-            update_field = entities.get("update_field")
-            update_value = entities.get("update_value")
-            if update_field:
-                if update_field == "hcp_sentiment":
-                    hcp_sentiment = update_value.lower() if update_value.lower() in ["positive", "neutral", "negative"] else hcp_sentiment
-                elif update_field == "interaction_type":
-                    interaction_type = update_value.lower() if update_value.lower() in ["meeting", "call", "email", "visit"] else interaction_type
-                elif update_field == "date":
+    """Router node classifies the message; one dedicated node handles each intent."""
+    workflow = StateGraph(RoutedState)
+
+    async def route(state: RoutedState) -> Dict[str, Any]:
+        return {"intent": detect_intent(state.messages[-1]["content"])}
+
+    async def fetch(state: RoutedState) -> Dict[str, Any]:
+        entities, form = message_form(state)
+        hcp = await resolve_hcp(form["hcp_id"], form["hcp_name"])
+        if "error" in hcp:
+            return reply(state, hcp["error"])
+        hcp_name = hcp["name"]
+        specialty = form["specialty"] or hcp["specialty"] or ""
+        interaction_data = await fetch_latest_interaction.ainvoke(hcp["hcp_id"])
+        if "error" in interaction_data:
+            return reply(state, interaction_data["error"])
+        form = {field: interaction_data[field] or "" for field in EDITABLE_FIELDS}
+        form["hcp_id"] = interaction_data["hcp_id"]
+        form.update(hcp_name=hcp_name, specialty=specialty)
+        # Apply the update if specified (e.g., "HCP Sentiment to positive")
+        if entities["update_field"] and entities["update_value"]:
+            apply_update(form, entities["update_field"], entities["update_value"])
+        return reply(
+            state,
+            f"Form filled with latest interaction for {hcp_name}: HCP ID: {form['hcp_id']}, "
+            f"Specialty: {form['specialty'] or 'Not specified'}, {form_text(form)}",
+            interaction_id=interaction_data["interaction_id"], **form
+        )
+
+    async def fill(state: RoutedState, config: RunnableConfig) -> Dict[str, Any]:
+        _, form = message_form(state)
+        await emit(config, "form", form)
+        # Read-only lookup; unknown HCPs are created when the interaction is saved
+        if form["hcp_name"] and not form["hcp_id"]:
+            hcp = await resolve_hcp(hcp_name=form["hcp_name"])
+            if "error" not in hcp:
+                form["hcp_id"] = hcp["hcp_id"]
+                form["specialty"] = form["specialty"] or hcp["specialty"] or ""
+        # Only fill the form, do not auto-save; a new interaction has no id yet
+        return reply(
+            state,
+            f"Form filled: HCP Name: {form['hcp_name']}, HCP ID: {form['hcp_id']}, "
+            f"Specialty: {form['specialty'] or 'Not specified'}, {form_text(form)}",
+            interaction_id=0, **form
+        )
+
+    async def save(state: RoutedState, config: RunnableConfig) -> Dict[str, Any]:
+        _, form = message_form(state)
+        await emit(config, "form", form)
+        if not (form["hcp_id"] or form["hcp_name"]):
+            return reply(state, "Please provide HCP name or ID to save.")
+        hcp = await resolve_hcp(form["hcp_id"], form["hcp_name"], form["specialty"], create=True)
+        if "error" in hcp:
+            return reply(state, hcp["error"])
+        form["hcp_id"] = hcp["hcp_id"]
+        # Update the interaction being edited, otherwise create a new one
+        if state.interaction_id:
+            result = await edit_interaction.ainvoke({"interaction_id": state.interaction_id, **tool_args(form)})
+            label = "Interaction updated"
+        elif is_streaming(config):
+            # Commit first, then stream the summary to the client as it is generated
+            result = await save_interaction(tool_args(form), "claimed")
+            label = "Interaction created"
+            if "error" not in result:
+                await emit(config, "saved", {"id": result["id"]})
+                if result["outcome"] == RUNNING:
                     try:
-                        datetime.strptime(update_value, '%Y-%m-%d')
-                        date = update_value
-                    except ValueError:
-                        date = date  # Keep existing date if invalid
-                elif update_field == "time":
-                    time = update_value + ":00" if len(update_value.split(":")) == 2 else update_value
-                elif update_field == "attendees":
-                    attendees = update_value
-                elif update_field == "topic_discussed":
-                    topic_discussed = update_value
-                elif update_field == "materials_shared":
-                    materials_shared = update_value
-                elif update_field == "outcomes":
-                    outcomes = update_value
-                elif update_field == "follow_up_action":
-                    follow_up_action = update_value
-                elif update_field == "specialty":
-                    specialty = update_value
-
-            # Fill the form with the fetched (and possibly updated) data
-            return InteractionState(
-                messages=state.messages + [{"role": "assistant", "content": f"Form filled with latest interaction for {hcp_name}: HCP ID: {hcp_id}, Specialty: {specialty or 'Not specified'}, Interaction Type: {interaction_type or 'Not specified'}, Date: {date or 'Not specified'}, Time: {time or 'Not specified'}, Attendees: {attendees or 'Not specified'}, Topic: {topic_discussed or 'Not specified'}, Materials: {materials_shared or 'Not specified'}, Sentiment: {hcp_sentiment or 'Not specified'}, Outcomes: {outcomes or 'Not specified'}, Follow-Up: {follow_up_action or 'Not specified'}"}],
-                hcp_id=hcp_id,
-                hcp_name=hcp_name,
-                specialty=specialty,
-                interaction_type=interaction_type,
-                date=date,
-                time=time,
-                attendees=attendees,
-                topic_discussed=topic_discussed,
-                materials_shared=materials_shared,
-                hcp_sentiment=hcp_sentiment,
-                outcomes=outcomes,
-                follow_up_action=follow_up_action,
-                interaction_id=interaction_id
-            )
+                        result.update(await stream_enrichment(result["id"], result["topic_discussed"], config))
+                    except Exception:
+                        result.update(summary=None, outcome=PENDING)
+        else:
+            result = await log_interaction.ainvoke(tool_args(form))
+            label = "Interaction created"
+        if "error" in result:
+            return reply(state, result["error"])
+        if state.interaction_id:
+            await emit(config, "saved", {"id": result["id"]})
+        return reply(state, f"{label}: {str(result)}", **saved(result),
+                     hcp_name=form["hcp_name"], specialty=form["specialty"])
 
-        # Existing logic for "met" or "fill form" commands
-        if "fill form" in last_message or "met" in last_message:
-            # Reset interaction_id for new interactions
-            interaction_id = 0
-            # Only fill the form, do not auto-save
-            return InteractionState(
-                messages=state.messages + [{"role": "assistant", "content": f"Form filled: HCP Name: {hcp_name}, HCP ID: {hcp_id}, Specialty: {specialty or 'Not specified'}, Interaction Type: {interaction_type}, Date: {date or 'Not specified'}, Time: {time or 'Not specified'}, Attendees: {attendees or 'Not specified'}, Topic: {topic_discussed or 'Not specified'}, Materials: {materials_shared or 'Not specified'}, Sentiment: {hcp_sentiment or 'Not specified'}, Outcomes: {outcomes or 'Not specified'}, Follow-Up: {follow_up_action or 'Not specified'}"}],
-                hcp_id=hcp_id,
-                hcp_name=hcp_name,
-                specialty=specialty,
-                interaction_type=interaction_type,
-                date=date,
-                time=time,
-                attendees=attendees,
-                topic_discussed=topic_discussed,
-                materials_shared=materials_shared,
-                hcp_sentiment=hcp_sentiment,
-                outcomes=outcomes,
-                follow_up_action=follow_up_action,
-                interaction_id=interaction_id
-            )
-        elif "log interaction" in last_message or "save" in last_message:
-            if not hcp_id:
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": "Please provide HCP name or ID to save."}])
-            # Check if we're updating an existing interaction
-            if interaction_id:
-                result = await edit_interaction.ainvoke({
-                    "interaction_id": interaction_id,
-                    "hcp_id": hcp_id,
-                    "interaction_type": interaction_type,
-                    "date": date,
-                    "time": time,
-                    "attendees": attendees,
-                    "topic_discussed": topic_discussed,
-                    "materials_shared": materials_shared,
-                    "hcp_sentiment": hcp_sentiment,
-                    "outcomes": outcomes,
-                    "follow_up_action": follow_up_action
-                })
-                if "error" in result:
-                    return InteractionState(messages=state.messages + [{"role": "assistant", "content": result["error"]}])
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": f"Interaction updated: {str(result)}"}], **result)
-            else:
-                # Create a new interaction
-                result = await log_interaction.ainvoke({
-                    "hcp_id": hcp_id,
-                    "interaction_type": interaction_type,
-                    "date": date,
-                    "time": time,
-                    "attendees": attendees,
-                    "topic_discussed": topic_discussed,
-                    "materials_shared": materials_shared,
-                    "hcp_sentiment": hcp_sentiment,
-                    "outcomes": outcomes,
-                    "follow_up_action": follow_up_action
-                })
-                if "error" in result:
-                    return InteractionState(messages=state.messages + [{"role": "assistant", "content": result["error"]}])
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": f"Interaction created: {str(result)}"}], **result)
-        elif "edit interaction" in last_message:
-            if not (interaction_id and hcp_id):
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": "Please provide interaction ID and HCP name or ID to edit."}])
-            result = await edit_interaction.ainvoke({
-                "interaction_id": interaction_id,
-                "hcp_id": hcp_id,
-                "interaction_type": interaction_type,
-                "date": date,
-                "time": time,
-                "attendees": attendees,
-                "topic_discussed": topic_discussed,
-                "materials_shared": materials_shared,
-                "hcp_sentiment": hcp_sentiment,
-                "outcomes": outcomes,
-                "follow_up_action": follow_up_action
-            })
-            if "error" in result:
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": result["error"]}])
-            return InteractionState(messages=state.messages + [{"role": "assistant", "content": str(result)}], **result)
-        elif "delete interaction" in last_message:
-            if not interaction_id:
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": "Please provide interaction ID to delete."}])
-            result = await delete_interaction.ainvoke({"interaction_id": interaction_id})
-            if "error" in result:
-                return InteractionState(messages=state.messages + [{"role": "assistant", "content": result["error"]}])
-            return InteractionState(messages=state.messages + [{"role": "assistant", "content": str(result)}])
-        return InteractionState(messages=state.messages + [{"role": "assistant", "content": "I didn't understand your command. Try 'fill form', 'save', 'edit', or 'delete'."}])
-
-    workflow.add_node("process_interaction", process_interaction)
-    workflow.set_entry_point("process_interaction")
-    workflow.add_edge("process_interaction", END)
+    async def edit(state: RoutedState) -> Dict[str, Any]:
+        _, form = message_form(state)
+        if not (state.interaction_id and form["hcp_id"]):
+            return reply(state, "Please provide interaction ID and HCP name or ID to edit.")
+        result = await edit_interaction.ainvoke({"interaction_id": state.interaction_id, **tool_args(form)})
+        if "error" in result:
+            return reply(state, result["error"])
+        return reply(state, str(result), **saved(result), hcp_name=form["hcp_name"], specialty=form["specialty"])
+
+    async def delete(state: RoutedState) -> Dict[str, Any]:
+        if not state.interaction_id:
+            return reply(state, "Please provide interaction ID to delete.")
+        result = await delete_interaction.ainvoke({"interaction_id": state.interaction_id})
+        if "error" in result:
+            return reply(state, result["error"])
+        # The form no longer refers to anything; start from a blank one
+        blank = InteractionState(messages=[]).model_dump(include=set(MESSAGE_FIELDS) | {"interaction_id"})
+        return reply(state, str(result), **blank)
+
+    async def summarize_notes(state: RoutedState) -> Dict[str, Any]:
+        _, form = message_form(state)
+        if not form["topic_discussed"]:
+            return reply(state, "Nothing to summarize yet: add the topic discussed first.")
+        try:
+            return reply(state, f"Summary: {await summarize(form['topic_discussed'])}")
+        except Exception as e:
+            return reply(state, f"Failed to summarize: {str(e)}")
+
+    async def unknown(state: RoutedState) -> Dict[str, Any]:
+        return reply(state, "I didn't understand your command. Try 'fill form', 'save', 'edit', 'delete' or 'summarize'.")
+
+    nodes = {
+        "fetch": fetch, "fill": fill, "save": save, "edit": edit,
+        "delete": delete, "summarize": summarize_notes, "unknown": unknown,
+    }
+    workflow.add_node("route", timed_tool(route))
+    for intent, node in nodes.items():
+        workflow.add_node(intent, timed_tool(node))
+        workflow.add_edge(intent, END)
+    workflow.set_entry_point("route")
+    workflow.add_conditional_edges("route", lambda state: state.intent, {intent: intent for intent in nodes})
     return workflow.compile()
 
-graph = create_workflow()
+# Compiled per process in startup()
+graph = None
 
 # Pydantic Models
 class InteractionCreate(BaseModel):
@@ -682,26 +729,52 @@ class InteractionCreate(BaseModel):
 
 class Interaction(BaseModel):
     id: int
-    hcp_id: str
-    interaction_type: str | None
-    date: str | None
-    time: str | None
-    attendees: str | None
-    topic_discussed: str | None
-    materials_shared: str | None
-    hcp_sentiment: str | None
-    outcomes: str | None
-    follow_up_action: str | None
-    summary: str | None
-    outcome: str | None
+    hcp_id: str | None = None
+    interaction_type: str | None = None
+    date: str | None = None
+    time: str | None = None
+    attendees: str | None = None
+    topic_discussed: str | None = None
+    materials_shared: str | None = None
+    hcp_sentiment: str | None = None
+    outcomes: str | None = None
+    follow_up_action: str | None = None
+    summary: str | None = None
+    outcome: str | None = None
+    duplicate_of: int | None = None
+
+# Columns of hcp_interactions in API order
+INTERACTION_COLUMNS = ("id",) + EDITABLE_FIELDS + ("summary", "outcome")
 
 # FastAPI Endpoints
-@app.on_event("startup")
-async def startup_event():
+async def startup():
+    """Create per-process resources; runs in every worker after it has started."""
+    global graph
+    graph = create_workflow()
+    init_llm()
+    init_cache()
+    init_sessions()
     await init_db()
+    await init_directory().warm(pool)
+    await init_search_index().warm(pool)
+    await init_duplicates().warm(pool)
+    await start_enrichment_queue()
+
+async def shutdown():
+    """Stop background work first so workers don't hit a closed pool."""
+    if enrichment_queue is not None:
+        await enrichment_queue.stop()
+    await close_pool()
+    await close_llm()
+    close_cache()
+    close_sessions()
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
 
 @app.post("/interactions", response_model=Interaction)
-async def create_interaction(interaction: InteractionCreate):
+async def create_interaction(interaction: InteractionCreate, defer_enrichment: bool | None = None):
     result = await log_interaction.ainvoke({
         "hcp_id": interaction.hcp_id,
         "interaction_type": interaction.interaction_type,
@@ -712,12 +785,139 @@ async def create_interaction(interaction: InteractionCreate):
         "materials_shared": interaction.materials_shared,
         "hcp_sentiment": interaction.hcp_sentiment,
         "outcomes": interaction.outcomes,
-        "follow_up_action": interaction.follow_up_action
+        "follow_up_action": interaction.follow_up_action,
+        "defer_enrichment": defer_enrichment
     })
     if "error" in result:
-        raise HTTPException(status_code=400, detail=result["error"])
+        status_code = 409 if "duplicate_of" in result else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
     return result
 
+@app.post("/interactions/batch")
+async def create_interactions_batch(request: Request, enrich_rows: bool = Query(True, alias="enrich")):
+    """Bulk-insert interactions from a JSON array or an NDJSON upload.
+
+    All valid rows are inserted in one transaction; enrichment is queued to
+    the background workers. Near-duplicates, of recent interactions or of
+    earlier rows in the batch, get "duplicate_of" and with DEDUP_MODE=skip
+    are not inserted (status "duplicate"). Returns a per-row report with
+    timing stats.
+    """
+    started = perf_counter()
+    try:
+        items = parse_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {str(e)}")
+    max_rows = int(os.getenv("INGEST_MAX_ROWS", "10000"))
+    if len(items) > max_rows:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {max_rows} rows")
+
+    results = [{"index": i, "status": "error", "id": None, "error": None, "duplicate_of": None}
+               for i in range(len(items))]
+    valid = []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, InteractionCreate.model_validate(item)))
+        except ValidationError as e:
+            results[i]["error"] = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+
+    # Validate every HCP ID up front: directory first, one IN (...) query for the rest
+    hcp_ids = {interaction.hcp_id for _, interaction in valid}
+    known = {hcp_id for hcp_id in hcp_ids if hcp_id in get_directory().by_id}
+    known |= await existing_hcp_ids(pool, hcp_ids - known)
+
+    rows = []
+    pending = []
+    valid_by_index = dict(valid)
+    # Rows of this batch, keyed by index: they have no id until inserted
+    duplicates = get_duplicates()
+    batch_index = DuplicateIndex(threshold=duplicates.threshold, max_per_hcp=len(items), max_entries=len(items))
+    duplicate_refs = {}
+    for i, interaction in valid:
+        if interaction.hcp_id not in known:
+            results[i]["error"] = f"HCP ID {interaction.hcp_id} not found"
+            continue
+        notes = interaction.topic_discussed
+        defer = bool(enrich_rows and notes)
+        try:
+            params = to_params(interaction.model_dump(), None if defer else "", PENDING if defer else "")
+        except ValueError as e:
+            results[i]["error"] = f"Invalid date or time format: {str(e)}"
+            continue
+        if notes and duplicates.enabled:
+            earlier = duplicates.find(interaction.hcp_id, interaction.date, notes)
+            in_batch = batch_index.find(interaction.hcp_id, interaction.date, notes) if earlier is None else None
+            if earlier is not None or in_batch is not None:
+                duplicate_refs[i] = (earlier, in_batch)
+                if duplicates.mode == "skip":
+                    results[i]["status"] = "duplicate"
+                    continue
+            batch_index.add(i, interaction.hcp_id, interaction.date, notes)
+        rows.append(params)
+        pending.append((i, notes if defer else None))
+    validated = perf_counter()
+
+    try:
+        ids = await insert_rows(pool, rows, int(os.getenv("INGEST_CHUNK_SIZE", "500"))) if rows else []
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Batch insert failed, no rows saved: {str(e)}")
+    inserted = perf_counter()
+
+    queued = 0
+    search_index = get_search_index()
+    id_of = {i: interaction_id for (i, _), interaction_id in zip(pending, ids)}
+    for i, (earlier, in_batch) in duplicate_refs.items():
+        results[i]["duplicate_of"] = earlier if earlier is not None else id_of[in_batch]
+    for (i, notes), interaction_id in zip(pending, ids):
+        interaction = valid_by_index[i]
+        results[i].update(status="created", id=interaction_id)
+        search_index.put({"id": interaction_id, **interaction.model_dump(), "summary": None})
+        duplicates.add(interaction_id, interaction.hcp_id, interaction.date, interaction.topic_discussed)
+        if notes:
+            await enrichment_queue.submit(interaction_id, notes)
+            queued += 1
+    elapsed = perf_counter() - started
+    return {
+        "results": results,
+        "stats": {
+            "received": len(items),
+            "created": len(ids),
+            "duplicates": len(duplicate_refs),
+            "failed": sum(result["status"] == "error" for result in results),
+            "enrichment_queued": queued,
+            "validate_ms": round((validated - started) * 1000, 2),
+            "insert_ms": round((inserted - validated) * 1000, 2),
+            "total_ms": round(elapsed * 1000, 2),
+            "rows_per_sec": round(len(ids) / elapsed, 1) if elapsed else None,
+        }
+    }
+
+@app.get("/interactions/{interaction_id}/enrichment")
+async def get_enrichment_status(interaction_id: int, wait: float = 0):
+    """Report background enrichment status; `wait` long-polls up to that many seconds."""
+    status = enrichment_queue.get_status(interaction_id)
+    if status and status["status"] in (PENDING, RUNNING) and wait > 0:
+        status = await enrichment_queue.wait(interaction_id, min(wait, 30))
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT summary, outcome FROM hcp_interactions WHERE id = %s", (interaction_id,)
+            )
+            row = await cursor.fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Interaction not found")
+    if status is None:
+        # Not tracked by this process (e.g. after a restart): derive it from the row
+        status = {"status": row[1] if row[1] in (PENDING, RUNNING) else "done", "attempts": None, "error": None}
+    return {
+        "interaction_id": interaction_id,
+        "status": status["status"],
+        "attempts": status["attempts"],
+        "error": status["error"],
+        "summary": row[0],
+        "outcome": row[1]
+    }
+
 @app.put("/interactions/{interaction_id}", response_model=Interaction)
 async def update_interaction(interaction_id: int, interaction: InteractionCreate):
     result = await edit_interaction.ainvoke({
@@ -744,77 +944,285 @@ async def delete_interaction_endpoint(interaction_id: int):
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
-@app.get("/interactions", response_model=List[Interaction])
-async def get_interactions():
+@app.get("/interactions", response_model=List[Interaction], response_class=FastJSONResponse)
+async def get_interactions(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: int | None = Query(None, description="Value of X-Next-Cursor from the previous page"),
+    hcp_id: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    interaction_type: str | None = None,
+    sentiment: str | None = None,
+    outcome: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return; id is always included"),
+):
+    """List interactions in id order, one keyset page at a time.
+
+    When more rows match, the cursor for the next page is returned in the
+    X-Next-Cursor header. Rows come straight from the database, so they are
+    encoded without a response_model validation pass.
+    """
+    columns = INTERACTION_COLUMNS
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested - set(INTERACTION_COLUMNS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        columns = tuple(column for column in INTERACTION_COLUMNS if column == "id" or column in requested)
+
+    try:
+        filters = (
+            ("id >", cursor),
+            ("hcp_id =", hcp_id),
+            ("date >=", date_from and datetime.strptime(date_from, '%Y-%m-%d').date()),
+            ("date <=", date_to and datetime.strptime(date_to, '%Y-%m-%d').date()),
+            ("interaction_type =", interaction_type),
+            ("hcp_sentiment =", sentiment),
+            ("outcome =", outcome),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid date format: {str(e)}")
+    conditions = [f"{condition} %s" for condition, value in filters if value]
+    params = [value for _, value in filters if value]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
     async with pool.acquire() as conn:
-        async with conn.cursor() as cursor:
-            await cursor.execute("""
-                SELECT id, hcp_id, interaction_type, date, time, attendees, topic_discussed,
-                       materials_shared, hcp_sentiment, outcomes, follow_up_action, summary, outcome
-                FROM hcp_interactions
-            """)
-            rows = await cursor.fetchall()
-            return [
-                Interaction(
-                    id=row[0],
-                    hcp_id=row[1],
-                    interaction_type=row[2],
-                    date=row[3].strftime('%Y-%m-%d') if row[3] else None,
-                    time=(
-                        f"{row[4].seconds//3600:02}:{(row[4].seconds//60)%60:02}:{row[4].seconds%60:02}"
-                        if row[4] else None
-                    ),
-                    attendees=row[5],
-                    topic_discussed=row[6],
-                    materials_shared=row[7],
-                    hcp_sentiment=row[8],
-                    outcomes=row[9],
-                    follow_up_action=row[10],
-                    summary=row[11],
-                    outcome=row[12]
-                )
-                for row in rows
-            ]
+        async with conn.cursor() as db_cursor:
+            await db_cursor.execute(
+                f"SELECT {', '.join(columns)} FROM hcp_interactions {where} ORDER BY id LIMIT %s",
+                (*params, limit + 1)
+            )
+            rows = await db_cursor.fetchall()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = str(rows[-1][0])
+    convert = row_converter(columns)
+    return FastJSONResponse([convert(row) for row in rows], headers=headers)
 
-@app.post("/chat")
-async def chat_interaction(message: Dict[str, str]):
-    state = InteractionState(
-        messages=[{"role": "user", "content": message["text"]}],
-        hcp_id=message.get("hcp_id", ""),
-        hcp_name=message.get("hcp_name", ""),
-        specialty=message.get("specialty", ""),
-        interaction_type=message.get("interaction_type", ""),
-        date=message.get("date", ""),
-        time=message.get("time", ""),
-        attendees=message.get("attendees", ""),
-        topic_discussed=message.get("topic_discussed", ""),
-        materials_shared=message.get("materials_shared", ""),
-        hcp_sentiment=message.get("hcp_sentiment", ""),
-        outcomes=message.get("outcomes", ""),
-        follow_up_action=message.get("follow_up_action", ""),
-        interaction_id=int(message.get("interaction_id", 0))
-    )
-    result_dict = await graph.ainvoke(state)
-    result_state = InteractionState(**result_dict)
+# Search results carry their relevance score after the interaction columns
+search_row = row_converter(INTERACTION_COLUMNS + ("score",))
+
+@app.get("/interactions/search", response_class=FastJSONResponse)
+async def search_interactions(
+    q: str = Query(..., min_length=1, max_length=500),
+    hcp_id: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    mode: str = Query("natural", pattern="^(natural|boolean)$"),
+):
+    """Interactions ranked by how well their notes, summary and outcomes match `q`.
+
+    Natural-language queries use the in-process index when SEARCH_INDEX=memory
+    and it has finished loading; boolean queries (+term -term "phrase") and
+    everything else go to the MySQL FULLTEXT index.
+    """
+    search_index = get_search_index()
+    if mode == "natural" and search_index.ready:
+        total, hits = search_index.search(pool, q, limit, offset, hcp_id)
+        rows = await fetch_by_ids(pool, INTERACTION_COLUMNS, [interaction_id for interaction_id, _ in hits])
+        results = []
+        for interaction_id, score in hits:
+            row = rows.get(interaction_id)
+            if row is None:
+                # Deleted by another worker since it was indexed
+                search_index.remove(interaction_id)
+                total -= 1
+                continue
+            results.append(row + (score,))
+        source = "memory"
+    else:
+        total, results = await fulltext_search(pool, INTERACTION_COLUMNS, q, limit, offset, hcp_id, mode == "boolean")
+        source = "mysql"
+    return FastJSONResponse({
+        "query": q,
+        "total": total,
+        "source": source,
+        "results": [search_row(row) for row in results],
+    })
+
+@app.get("/interactions/export")
+async def export_interactions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since_id: int | None = None,
+    since_updated_at: str | None = Query(None, description="ISO timestamp; export rows changed after it"),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+):
+    """Stream interactions as NDJSON or CSV without buffering the result set."""
+    conditions = []
+    params = []
+    if since_id is not None:
+        conditions.append("id > %s")
+        params.append(since_id)
+    if since_updated_at:
+        try:
+            params.append(datetime.fromisoformat(since_updated_at))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid since_updated_at: {str(e)}")
+        conditions.append("updated_at > %s")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order_by = "updated_at, id" if since_updated_at else "id"
+    chunks = stream_rows(pool, where, params, order_by, chunk_size)
+    if format == "csv":
+        return StreamingResponse(csv_chunks(chunks), media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=interactions.csv"})
+    return StreamingResponse(ndjson_chunks(chunks), media_type="application/x-ndjson")
+
+@app.get("/analytics/hcps/{hcp_id}")
+async def hcp_analytics(hcp_id: str, weeks: int = Query(12, ge=1, le=520)):
+    """Sentiment and outcome distribution of one HCP over the last `weeks` weeks, from the rollups."""
+    return {"hcp_id": hcp_id, "weeks": weeks, **await rollups.hcp_report(pool, hcp_id, weeks)}
+
+@app.get("/analytics/specialties/{specialty}")
+async def specialty_analytics(specialty: str, weeks: int = Query(12, ge=1, le=520)):
+    """The same distribution summed over every HCP with this specialty."""
+    return {"specialty": specialty, "weeks": weeks, **await rollups.specialty_report(pool, specialty, weeks)}
+
+@app.get("/analytics/weekly")
+async def weekly_analytics(weeks: int = Query(12, ge=1, le=520)):
+    """The same distribution over all HCPs."""
+    return {"weeks": weeks, **await rollups.weekly_report(pool, weeks)}
+
+@app.get("/db/pool/stats")
+async def db_pool_stats():
+    return pool.stats()
+
+@app.get("/llm-cache/stats")
+async def llm_cache_stats():
+    return get_cache().stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of this worker's metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def require_profiler():
+    if os.getenv("PROFILER_ENABLED", "0") != "1":
+        raise HTTPException(status_code=404, detail="Profiler disabled; set PROFILER_ENABLED=1")
+
+@app.post("/debug/profiler/start")
+async def start_profiler(interval_ms: float = Query(5, gt=0, le=1000)):
+    """Start sampling the event loop thread of this worker."""
+    require_profiler()
+    profiler.start(interval_ms / 1000)
+    return profiler.status()
+
+@app.post("/debug/profiler/stop")
+async def stop_profiler():
+    require_profiler()
+    profiler.stop()
+    return profiler.status()
+
+@app.get("/debug/profiler", response_class=PlainTextResponse)
+async def profiler_stacks():
+    """Collapsed stacks collected so far (flamegraph.pl / speedscope input)."""
+    require_profiler()
+    return PlainTextResponse(profiler.collapsed())
+
+# Form fields of InteractionState, as exchanged with the client
+FORM_FIELDS = tuple(field for field in InteractionState.model_fields if field != "messages")
+
+def form_values(message: Dict[str, str]) -> Dict[str, Any]:
+    """Form fields present in a /chat request body."""
+    values = {field: message[field] for field in FORM_FIELDS if field in message}
+    if "interaction_id" in values:
+        values["interaction_id"] = int(values["interaction_id"] or 0)
+    return values
+
+async def start_turn(message: Dict[str, str]) -> tuple:
+    """Build the graph input for a /chat request; returns (state, session_id or None)."""
+    user_message = {"role": "user", "content": message["text"]}
+    if "session_id" not in message:
+        return InteractionState(messages=[user_message], **form_values(message)), None
+    session_id = message["session_id"]
+    data = await get_sessions().get(session_id) if session_id else None
+    if data is None:
+        # New, expired or evicted session
+        session_id = new_session_id()
+        previous = InteractionState(messages=[])
+    else:
+        previous = InteractionState(**data)
+    state = previous.model_copy(update={"messages": previous.messages + [user_message], **form_values(message)})
+    return state, session_id
+
+async def finish_turn(state: InteractionState, result: Dict[str, Any], session_id: str | None) -> Dict[str, Any]:
+    """Store the session, if any, and build the /chat response body."""
+    result_state = InteractionState(**result)
+    if session_id is None:
+        return {
+            "response": result_state.messages[-1]["content"],
+            "form_data": result_state.model_dump(include=set(FORM_FIELDS))
+        }
+    result_state.messages = result_state.messages[-MAX_HISTORY:]
+    await get_sessions().put(session_id, result_state.model_dump())
     return {
         "response": result_state.messages[-1]["content"],
-        "form_data": {
-            "hcp_id": result_state.hcp_id,
-            "hcp_name": result_state.hcp_name,
-            "specialty": result_state.specialty,
-            "interaction_type": result_state.interaction_type,
-            "date": result_state.date,
-            "time": result_state.time,
-            "attendees": result_state.attendees,
-            "topic_discussed": result_state.topic_discussed,
-            "materials_shared": result_state.materials_shared,
-            "hcp_sentiment": result_state.hcp_sentiment,
-            "outcomes": result_state.outcomes,
-            "follow_up_action": result_state.follow_up_action,
-            "interaction_id": result_state.interaction_id
+        "session_id": session_id,
+        "changes": {
+            field: getattr(result_state, field) for field in FORM_FIELDS
+            if getattr(result_state, field) != getattr(state, field)
         }
     }
 
+@app.post("/chat")
+async def chat_interaction(message: Dict[str, str]):
+    """Run one chat turn.
+
+    Without "session_id" the client sends the whole form and gets the whole
+    form back. With "session_id" (empty to start a session) the form and
+    message history are kept on the server: the client sends the text plus
+    any fields edited by hand, and gets back only the fields that changed.
+    """
+    state, session_id = await start_turn(message)
+    return await finish_turn(state, await graph.ainvoke(state), session_id)
+
+@app.post("/chat/stream")
+async def chat_stream(message: Dict[str, str]):
+    """Run one chat turn, reporting progress as server-sent events.
+
+    Events: "form" (parsed fields, before any I/O), "saved" (after the
+    INSERT commits), "summary" (summary tokens), "outcome", and finally
+    "done" with the same body /chat returns, or "error" if the turn failed
+    (the session is then left unchanged).
+    """
+    state, session_id = await start_turn(message)
+
+    async def events():
+        result = None
+        config = {"configurable": {"stream": True}}
+        try:
+            async for event in graph.astream_events(state, config=config, version="v2"):
+                if event["event"] == "on_custom_event":
+                    yield sse_event(event["name"], event["data"])
+                elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+                    result = event["data"]["output"]
+        except Exception as e:
+            # Headers are already sent: report the failure in the stream
+            yield sse_event("error", {"detail": str(e)})
+            return
+        if result is None:
+            yield sse_event("error", {"detail": "Chat turn produced no result"})
+            return
+        yield sse_event("done", await finish_turn(state, result, session_id))
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/chat/sessions/{session_id}")
+async def get_chat_session(session_id: str):
+    """Current form and message history of a session, e.g. to restore it after a page reload."""
+    data = await get_sessions().get(session_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"session_id": session_id, "messages": data["messages"],
+            "form_data": {field: data[field] for field in FORM_FIELDS}}
+
+@app.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    if not await get_sessions().delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"message": "Session deleted"}
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from serve import main as serve
+    serve()
@@ -0,0 +1,188 @@
+"""In-process metrics exported in the Prometheus text format.
+
+Histograms and counters are updated inline; gauges are read from callbacks
+at scrape time, so components only need a stats() method. Metrics are per
+process: with several workers, each worker reports its own.
+"""
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, Tuple
+
+# Seconds; covers sub-millisecond regex parsing up to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in self._values.items():
+            yield f"{self.name}{_labels(self.labels, key)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {cumulative}"
+
+
+class GaugeSet:
+    """Gauges read from `collect()` at scrape time: {metric suffix: value} from a stats() dict."""
+
+    def __init__(self, prefix: str, help: str, collect: Callable[[], Dict[str, float]]):
+        self.prefix = prefix
+        self.help = help
+        self.collect = collect
+
+    def render(self) -> Iterable[str]:
+        try:
+            values = self.collect()
+        except Exception:
+            # A component that is not initialized yet simply reports nothing
+            return
+        for suffix, value in values.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            name = f"{self.prefix}_{suffix}"
+            yield f"# HELP {name} {self.help} ({suffix})"
+            yield f"# TYPE {name} gauge"
+            yield f"{name} {value}"
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency until the response starts", ("method", "route", "status")
+)
+TOOL_SECONDS = Histogram("tool_duration_seconds", "Latency of tools and chat workflow steps", ("tool",))
+LLM_SECONDS = Histogram("llm_request_duration_seconds", "Latency of LLM calls", ("kind", "status"))
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens used", ("type",))
+SQL_SECONDS = Histogram("sql_query_duration_seconds", "Latency of SQL statements", ("statement",))
+POOL_WAIT_SECONDS = Histogram("db_pool_wait_seconds", "Time spent waiting for a database connection")
+OUTCOME_SOURCES = Counter("outcome_classifications_total", "Outcome labels by the tier that decided", ("source",))
+
+registry = [REQUEST_SECONDS, TOOL_SECONDS, LLM_SECONDS, LLM_TOKENS, SQL_SECONDS, POOL_WAIT_SECONDS, OUTCOME_SOURCES]
+
+
+def register_gauges(prefix: str, help: str, collect: Callable[[], Dict[str, float]]):
+    registry.append(GaugeSet(prefix, help, collect))
+
+
+def render() -> str:
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+def timed_tool(func):
+    """Record the duration of an async function in tool_duration_seconds, labelled with its name."""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        with TOOL_SECONDS.time(tool=func.__name__):
+            return await func(*args, **kwargs)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each request until its response starts.
+
+    Requests are labelled with the route template (or endpoint name), never
+    the raw path, to keep the number of series bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            recorded = True
+            route = scope.get("route")
+            endpoint = scope.get("endpoint")
+            name = getattr(route, "path", None) or getattr(endpoint, "__name__", None) or "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope["method"], route=name, status=status)
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            if not recorded:
+                record(500)
+
+
+TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|TABLE)\s+(?:IF\s+NOT\s+EXISTS\s+)?`?(\w+)", re.IGNORECASE)
+
+
+def statement_label(sql: str) -> str:
+    """Low-cardinality label for a statement, e.g. "SELECT hcp_profiles"."""
+    words = sql.split(None, 2)
+    if not words:
+        return "other"
+    verb = words[0].upper()
+    if verb == "UPDATE":
+        table = words[1] if len(words) > 1 else None
+    else:
+        match = TABLE_PATTERN.search(sql)
+        table = match.group(1) if match else None
+    return f"{verb} {table}" if table else verb
@@ -0,0 +1,120 @@
+"""Versioned schema migrations.
+
+Each migration is applied once, in order, and recorded in
+schema_migrations. A MySQL named lock keeps concurrently starting
+workers from applying the same migration twice.
+"""
+import aiomysql
+
+# MySQL errors meaning the change is already in place (duplicate key name / column)
+ALREADY_APPLIED = (1060, 1061)
+
+MIGRATIONS = [
+    (1, "create hcp_interactions and hcp_profiles", [
+        """
+        CREATE TABLE IF NOT EXISTS hcp_interactions (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            hcp_id VARCHAR(36) NOT NULL,
+            interaction_type VARCHAR(50),
+            date DATE,
+            time TIME,
+            attendees TEXT,
+            topic_discussed TEXT,
+            materials_shared TEXT,
+            hcp_sentiment VARCHAR(20),
+            outcomes TEXT,
+            follow_up_action TEXT,
+            summary TEXT,
+            outcome VARCHAR(50)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS hcp_profiles (
+            hcp_id VARCHAR(36) PRIMARY KEY,
+            name VARCHAR(100),
+            specialty VARCHAR(100)
+        )
+        """,
+    ]),
+    # Serves fetch_latest_interaction (WHERE hcp_id ORDER BY date, time) and name lookups.
+    # The name index is not unique: different HCPs can share a name.
+    (2, "index interactions by hcp/date/time and profiles by name", [
+        "CREATE INDEX idx_interactions_hcp_date_time ON hcp_interactions (hcp_id, date, time)",
+        "CREATE INDEX idx_profiles_name ON hcp_profiles (name)",
+    ]),
+    # Lets exports pick up rows changed since a previous run
+    (3, "track hcp_interactions.updated_at", [
+        """
+        ALTER TABLE hcp_interactions ADD COLUMN updated_at TIMESTAMP NOT NULL
+            DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        """,
+        "CREATE INDEX idx_interactions_updated_at ON hcp_interactions (updated_at, id)",
+    ]),
+    # Serves GET /interactions/search (MATCH ... AGAINST over the same columns, in this order)
+    (4, "fulltext index on interaction notes, summary and outcomes", [
+        "CREATE FULLTEXT INDEX idx_interactions_fulltext ON hcp_interactions (topic_discussed, summary, outcomes)",
+    ]),
+    # Counts per (hcp, week, sentiment, outcome), kept up to date by rollups.py; backfilled here
+    (5, "create hcp_interaction_rollups", [
+        """
+        CREATE TABLE IF NOT EXISTS hcp_interaction_rollups (
+            hcp_id VARCHAR(36) NOT NULL,
+            week DATE NOT NULL,
+            hcp_sentiment VARCHAR(20) NOT NULL,
+            outcome VARCHAR(50) NOT NULL,
+            interactions INT NOT NULL,
+            PRIMARY KEY (hcp_id, week, hcp_sentiment, outcome),
+            INDEX idx_rollups_week (week)
+        )
+        """,
+        "CREATE INDEX idx_profiles_specialty ON hcp_profiles (specialty)",
+        """
+        INSERT INTO hcp_interaction_rollups (hcp_id, week, hcp_sentiment, outcome, interactions)
+        SELECT hcp_id, COALESCE(DATE_SUB(date, INTERVAL WEEKDAY(date) DAY), '1000-01-01'),
+               COALESCE(hcp_sentiment, ''), COALESCE(outcome, ''), COUNT(*)
+        FROM hcp_interactions GROUP BY 1, 2, 3, 4
+        """,
+    ]),
+]
+
+
+async def applied_versions(cursor) -> set:
+    await cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in await cursor.fetchall()}
+
+
+async def migrate(pool, target: int = None) -> list:
+    """Apply pending migrations up to `target` (default: all) and return their versions."""
+    applied = []
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INT PRIMARY KEY,
+                    name VARCHAR(200) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await cursor.execute("SELECT GET_LOCK('schema_migrations', 60)")
+            # 0 on timeout, NULL on error: never migrate without the lock
+            if (await cursor.fetchone())[0] != 1:
+                raise RuntimeError("Could not acquire the schema_migrations lock; is another process migrating?")
+            try:
+                done = await applied_versions(cursor)
+                for version, name, statements in MIGRATIONS:
+                    if version in done or (target is not None and version > target):
+                        continue
+                    for statement in statements:
+                        try:
+                            await cursor.execute(statement)
+                        except aiomysql.MySQLError as e:
+                            if e.args[0] not in ALREADY_APPLIED:
+                                raise
+                    await cursor.execute(
+                        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name)
+                    )
+                    await conn.commit()
+                    applied.append(version)
+            finally:
+                await cursor.execute("SELECT RELEASE_LOCK('schema_migrations')")
+    return applied
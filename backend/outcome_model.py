@@ -0,0 +1,206 @@
+"""Local outcome classifier, tried before the LLM.
+
+Two tiers, both answering in microseconds:
+- keyword rules for notes that state the outcome outright;
+- a multinomial logistic regression over hashed word unigrams and bigrams,
+  trained on outcomes the LLM has already assigned.
+classify_local() returns the label and confidence of the first tier that
+is sure enough; below OUTCOME_CONFIDENCE the caller asks the LLM.
+
+The model needs NumPy and a weights file (OUTCOME_MODEL_PATH, default
+outcome_model.npz next to this module); without either only the rules
+run. Train it from an NDJSON export (GET /interactions/export):
+    python outcome_model.py interactions.ndjson [--output outcome_model.npz]
+"""
+import argparse
+import json
+import os
+import re
+import zlib
+from typing import List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the model tier is optional
+    np = None
+
+OUTCOME_LABELS = ("interested", "not interested", "follow-up needed")
+# Stored when an LLM answer names none of the labels: a person should look at it
+FALLBACK_LABEL = "follow-up needed"
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outcome_model.npz")
+HASH_BITS = 18
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+NEGATIVE = re.compile(
+    r"\b(?:not interested|no interest|uninterested|declined|rejected|refused|"
+    r"(?:won'?t|will not|does not want to|doesn'?t want to) (?:prescribe|use|switch|try))\b"
+)
+FOLLOW_UP = re.compile(
+    r"\b(?:follow[- ]?up|call (?:\w+ )?back|schedule|get back to|send)\b"
+)
+POSITIVE = re.compile(
+    r"\b(?:agreed to|keen|will (?:prescribe|try|start)|interested in|very interested|enthusiastic|"
+    r"requested samples|wants to (?:start|try|prescribe))\b"
+)
+# A positive cue preceded by one of these in the same clause is negated
+# ("isn't interested in", "not really interested", "not keen on")
+NEGATION = re.compile(r"\b(?:not|never|no longer)\b|n['’]t\b")
+NEGATION_WINDOW = 3
+CLAUSE_BREAK = re.compile(r"[.,;:!?]|\bbut\b")
+
+
+def normalize_label(text: str) -> str:
+    """Map a free-form LLM answer such as "Outcome: Interested." onto one of OUTCOME_LABELS."""
+    text = " ".join(text.lower().split())
+    if re.search(r"\b(?:not interested|uninterested)\b", text):
+        return "not interested"
+    if re.search(r"follow[- ]?up", text):
+        return "follow-up needed"
+    if "interested" in text:
+        return "interested"
+    return FALLBACK_LABEL
+
+
+def negated(text: str, start: int) -> bool:
+    """Whether a negation cue is among the few words before `start`, in the same clause."""
+    clause = CLAUSE_BREAK.split(text[:start])[-1]
+    return bool(NEGATION.search(" ".join(clause.split()[-NEGATION_WINDOW:])))
+
+
+def classify_rules(notes: str) -> Tuple[str | None, float]:
+    """Label from unambiguous keywords; (None, 0.0) when none or conflicting ones match."""
+    text = notes.lower()
+    matches = [match.start() for match in POSITIVE.finditer(text)]
+    negated_positive = any(negated(text, start) for start in matches)
+    positive = any(not negated(text, start) for start in matches)
+    follow_up = FOLLOW_UP.search(text)
+    if NEGATIVE.search(text) or negated_positive:
+        return ("not interested", 0.95) if not (follow_up or positive) else (None, 0.0)
+    if follow_up and not positive:
+        return "follow-up needed", 0.9
+    if positive and not follow_up:
+        return "interested", 0.9
+    return None, 0.0
+
+
+def features(notes: str) -> List[int]:
+    """Hashed buckets of the unigrams and bigrams of `notes` (duplicates removed)."""
+    tokens = TOKEN_PATTERN.findall(notes.lower())
+    grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    mask = (1 << HASH_BITS) - 1
+    return list({zlib.crc32(gram.encode("utf-8")) & mask for gram in grams})
+
+
+class OutcomeModel:
+    """Softmax regression over hashed n-gram features."""
+
+    def __init__(self, weights, bias):
+        self.weights = weights
+        self.bias = bias
+
+    def predict(self, notes: str) -> Tuple[str | None, float]:
+        buckets = features(notes)
+        if not buckets:
+            return None, 0.0
+        logits = self.weights[buckets].sum(axis=0) + self.bias
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+        best = int(probabilities.argmax())
+        return OUTCOME_LABELS[best], float(probabilities[best])
+
+    @classmethod
+    def train(cls, notes: Sequence[str], labels: Sequence[str], epochs: int = 200,
+              learning_rate: float = 0.5, l2: float = 1e-6) -> "OutcomeModel":
+        """Fit by full-batch Adagrad on the cross-entropy loss."""
+        rows = [features(text) for text in notes]
+        docs = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+        buckets = np.fromiter((bucket for row in rows for bucket in row), dtype=np.int64, count=len(docs))
+        targets = np.zeros((len(rows), len(OUTCOME_LABELS)))
+        targets[np.arange(len(rows)), [OUTCOME_LABELS.index(label) for label in labels]] = 1
+        size = 1 << HASH_BITS
+        weights = np.zeros((size, len(OUTCOME_LABELS)))
+        bias = np.zeros(len(OUTCOME_LABELS))
+        weight_history = np.full_like(weights, 1e-8)
+        bias_history = np.full_like(bias, 1e-8)
+        for _ in range(epochs):
+            logits = np.stack([
+                np.bincount(docs, weights=weights[buckets, k], minlength=len(rows)) for k in range(len(OUTCOME_LABELS))
+            ], axis=1) + bias
+            probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            errors = (probabilities - targets) / len(rows)
+            weight_gradient = np.stack([
+                np.bincount(buckets, weights=errors[docs, k], minlength=size) for k in range(len(OUTCOME_LABELS))
+            ], axis=1) + l2 * weights
+            bias_gradient = errors.sum(axis=0)
+            weight_history += weight_gradient ** 2
+            bias_history += bias_gradient ** 2
+            weights -= learning_rate * weight_gradient / np.sqrt(weight_history)
+            bias -= learning_rate * bias_gradient / np.sqrt(bias_history)
+        return cls(weights.astype(np.float32), bias.astype(np.float32))
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias)
+
+    @classmethod
+    def load(cls, path: str) -> "OutcomeModel":
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"])
+
+
+# Loaded on first use; False when NumPy or the weights file is missing
+model = None
+
+
+def get_model() -> OutcomeModel | None:
+    global model
+    if model is None:
+        path = os.getenv("OUTCOME_MODEL_PATH", DEFAULT_MODEL_PATH)
+        model = OutcomeModel.load(path) if np is not None and os.path.exists(path) else False
+    return model or None
+
+
+def classify_local(notes: str) -> Tuple[str | None, float, str]:
+    """(label, confidence, tier) from the most confident local tier; tier is "rules" or "model"."""
+    label, confidence = classify_rules(notes)
+    if label is not None:
+        return label, confidence, "rules"
+    outcome_model = get_model()
+    if outcome_model is not None:
+        label, confidence = outcome_model.predict(notes)
+        return label, confidence, "model"
+    return None, 0.0, "none"
+
+
+def load_examples(path: str) -> Tuple[List[str], List[str]]:
+    """(notes, labels) of exported interactions whose outcome is one of OUTCOME_LABELS."""
+    notes, labels = [], []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("topic_discussed") and row.get("outcome") in OUTCOME_LABELS:
+                notes.append(row["topic_discussed"])
+                labels.append(row["outcome"])
+    return notes, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("export", help="NDJSON from GET /interactions/export")
+    parser.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--epochs", type=int, default=200)
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("training needs numpy")
+    notes, labels = load_examples(args.export)
+    if not notes:
+        raise SystemExit("no labelled interactions in the export")
+    OutcomeModel.train(notes, labels, epochs=args.epochs).save(args.output)
+    print(f"trained on {len(notes)} interactions, saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Sampling profiler for the event loop thread, toggled at runtime.
+
+A background thread records the loop thread's Python stack every
+`interval` seconds. Stacks are aggregated in the collapsed format
+("outer;inner;leaf count") that flamegraph.pl and speedscope read.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict
+
+
+class SamplingProfiler:
+    def __init__(self, max_stacks: int = 10000):
+        self.max_stacks = max_stacks
+        self.stacks = Counter()
+        self.samples = 0
+        self.dropped = 0
+        self.interval = None
+        self.started_at = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self, interval: float = 0.005):
+        """Sample the calling thread (the event loop) until stop()."""
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = self.dropped = 0
+        self.interval = interval
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(threading.get_ident(),), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self, thread_id: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.samples += 1
+            if key in self.stacks or len(self.stacks) < self.max_stacks:
+                self.stacks[key] += 1
+            else:
+                self.dropped += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "started_at": self.started_at,
+            "samples": self.samples,
+            "distinct_stacks": len(self.stacks),
+            "dropped": self.dropped,
+        }
+
+
+# Process-wide profiler; the /debug/profiler endpoints need PROFILER_ENABLED=1
+profiler = SamplingProfiler()
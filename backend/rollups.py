@@ -0,0 +1,158 @@
+"""Per-HCP weekly rollups of interaction sentiment and outcome.
+
+hcp_interaction_rollups holds one count per (hcp_id, week, hcp_sentiment,
+outcome) bucket. Every write to hcp_interactions applies its delta to the
+rollups in the same transaction, so analytics read a few rollup rows
+instead of scanning interactions. Weeks start on Monday; interactions
+without a date are counted under UNDATED_WEEK, which no report covers.
+Interactions still waiting for background enrichment keep their PENDING or
+RUNNING marker in the rollups too, but reports count them as
+"enrichment_pending" rather than as an outcome.
+
+Rebuild the rollups from scratch (e.g. after writing to hcp_interactions
+by hand) with:
+    python rollups.py
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from typing import Any, Dict, Sequence
+
+from database import init_pool, close_pool, transaction
+from enrichment_queue import PENDING, RUNNING
+from migrations import migrate
+from serialization import format_date
+
+TABLE = "hcp_interaction_rollups"
+UNDATED_WEEK = "1000-01-01"
+# Rollup bucket of an hcp_interactions row
+BUCKET = (
+    "hcp_id",
+    f"COALESCE(DATE_SUB(date, INTERVAL WEEKDAY(date) DAY), '{UNDATED_WEEK}')",
+    "COALESCE(hcp_sentiment, '')",
+    "COALESCE(outcome, '')",
+)
+# Columns whose change moves a row to another bucket
+ROLLUP_FIELDS = frozenset(("hcp_id", "date", "hcp_sentiment", "outcome"))
+
+
+async def add(cursor, where: str, params: Sequence, sign: int = 1):
+    """Add (sign=1) or subtract (sign=-1) the interactions matching `where`."""
+    await cursor.execute(
+        f"INSERT INTO {TABLE} (hcp_id, week, hcp_sentiment, outcome, interactions)"
+        f" SELECT {', '.join(BUCKET)}, %s * COUNT(*) FROM hcp_interactions WHERE {where} GROUP BY 1, 2, 3, 4"
+        " ON DUPLICATE KEY UPDATE interactions = interactions + VALUES(interactions)",
+        (sign, *params)
+    )
+
+
+async def update(cursor, where: str, params: Sequence, assignments: str, values: Sequence) -> int:
+    """UPDATE the interactions matching `where` and move them between buckets.
+
+    Runs inside a transaction: the rows are locked first, so exactly the
+    rows that get updated are subtracted and added back. Returns their count.
+    """
+    await cursor.execute(f"SELECT id FROM hcp_interactions WHERE {where} FOR UPDATE", params)
+    ids = [row[0] for row in await cursor.fetchall()]
+    if not ids:
+        return 0
+    by_id = f"id IN ({', '.join(['%s'] * len(ids))})"
+    await add(cursor, by_id, ids, -1)
+    await cursor.execute(f"UPDATE hcp_interactions SET {assignments} WHERE {by_id}", (*values, *ids))
+    await add(cursor, by_id, ids)
+    return len(ids)
+
+
+async def delete(cursor, where: str, params: Sequence) -> int:
+    """DELETE the interactions matching `where` and subtract them (inside a transaction)."""
+    await add(cursor, where, params, -1)
+    await cursor.execute(f"DELETE FROM hcp_interactions WHERE {where}", params)
+    return cursor.rowcount
+
+
+async def rebuild(pool):
+    """Recount every bucket from hcp_interactions; writers wait until it commits."""
+    async with transaction(pool) as cursor:
+        await cursor.execute(f"DELETE FROM {TABLE}")
+        await add(cursor, "1 = 1", ())
+
+
+def first_week(weeks: int) -> date:
+    """Monday of the oldest of the last `weeks` weeks, this week included."""
+    today = date.today()
+    return today - timedelta(days=today.weekday(), weeks=weeks - 1)
+
+
+def report(rows: Sequence[tuple]) -> Dict[str, Any]:
+    """Totals and per-week distributions from (week, sentiment, outcome, count) rows."""
+    totals = {"interactions": 0, "sentiment": {}, "outcomes": {}, "enrichment_pending": 0}
+    weekly = {}
+    for week, sentiment, outcome, count in rows:
+        count = int(count)
+        if not count:
+            continue
+        bucket = weekly.get(week)
+        if bucket is None:
+            bucket = weekly[week] = {
+                "week": format_date(week), "interactions": 0, "sentiment": {}, "outcomes": {}, "enrichment_pending": 0
+            }
+        for target in (totals, bucket):
+            target["interactions"] += count
+            target["sentiment"][sentiment or "unknown"] = target["sentiment"].get(sentiment or "unknown", 0) + count
+            if outcome in (PENDING, RUNNING):
+                target["enrichment_pending"] += count
+            else:
+                target["outcomes"][outcome or "unknown"] = target["outcomes"].get(outcome or "unknown", 0) + count
+    return {**totals, "weekly": [weekly[week] for week in sorted(weekly)]}
+
+
+async def _fetch(pool, sql: str, params: Sequence) -> Dict[str, Any]:
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(sql, params)
+            return report(await cursor.fetchall())
+
+
+async def hcp_report(pool, hcp_id: str, weeks: int) -> Dict[str, Any]:
+    return await _fetch(
+        pool,
+        f"SELECT week, hcp_sentiment, outcome, interactions FROM {TABLE} WHERE hcp_id = %s AND week >= %s",
+        (hcp_id, first_week(weeks))
+    )
+
+
+async def specialty_report(pool, specialty: str, weeks: int) -> Dict[str, Any]:
+    return await _fetch(
+        pool,
+        f"SELECT r.week, r.hcp_sentiment, r.outcome, SUM(r.interactions) FROM {TABLE} r"
+        " JOIN hcp_profiles p ON p.hcp_id = r.hcp_id"
+        " WHERE p.specialty = %s AND r.week >= %s GROUP BY 1, 2, 3",
+        (specialty, first_week(weeks))
+    )
+
+
+async def weekly_report(pool, weeks: int) -> Dict[str, Any]:
+    return await _fetch(
+        pool,
+        f"SELECT week, hcp_sentiment, outcome, SUM(interactions) FROM {TABLE} WHERE week >= %s GROUP BY 1, 2, 3",
+        (first_week(weeks),)
+    )
+
+
+async def run_rebuild():
+    pool = await init_pool()
+    try:
+        await migrate(pool)
+        await rebuild(pool)
+    finally:
+        await close_pool()
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    asyncio.run(run_rebuild())
+    print(f"{TABLE} rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""Full-text search over interaction notes, summaries and outcomes.
+
+By default searches go to MySQL, which answers them from the FULLTEXT
+index of migration 4. With SEARCH_INDEX=memory every worker also keeps an
+in-process inverted index of the same columns: warm-loaded at startup,
+updated by the interaction tools as they write, and caught up from
+updated_at once older than SEARCH_INDEX_REFRESH seconds, which picks up
+writes made by other workers and by the enrichment workers. Matches are
+ranked with BM25.
+"""
+import asyncio
+import heapq
+import math
+import os
+import re
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+from export import stream_rows
+
+# Columns covered by the FULLTEXT index, in index order
+SEARCH_FIELDS = ("topic_discussed", "summary", "outcomes")
+MATCH = f"MATCH({', '.join(SEARCH_FIELDS)})"
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Close to InnoDB's default FULLTEXT stopword list
+STOPWORDS = frozenset((
+    "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how", "i", "in",
+    "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "who",
+    "will", "with", "und", "www",
+))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.casefold())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+class InvertedIndex:
+    """BM25-ranked inverted index with compact array postings.
+
+    Each document gets an internal number; postings are parallel arrays of
+    numbers and term frequencies. Re-indexing or removing a document leaves
+    its old number behind as a tombstone until compact() drops it from the
+    postings.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_ids = array("I")
+        self.doc_lengths = array("I")
+        self.doc_hcps = array("I")
+        self.alive = bytearray()
+        self.hcp_codes = {}
+        self.live = {}
+        self.total_length = 0
+        self.tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self.live)
+
+    def add(self, interaction_id: int, hcp_id: str, text: str):
+        self.remove(interaction_id)
+        terms = Counter(tokenize(text))
+        doc = len(self.doc_ids)
+        length = sum(terms.values())
+        self.doc_ids.append(interaction_id)
+        self.doc_lengths.append(length)
+        self.doc_hcps.append(self.hcp_codes.setdefault(hcp_id, len(self.hcp_codes)))
+        self.alive.append(1)
+        for term, frequency in terms.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = (array("I"), array("H"))
+            entry[0].append(doc)
+            entry[1].append(min(frequency, 0xFFFF))
+        self.live[interaction_id] = doc
+        self.total_length += length
+
+    def remove(self, interaction_id: int) -> bool:
+        doc = self.live.pop(interaction_id, None)
+        if doc is None:
+            return False
+        self.alive[doc] = 0
+        self.total_length -= self.doc_lengths[doc]
+        self.tombstones += 1
+        if self.tombstones > max(10000, len(self.live)):
+            self.compact()
+        return True
+
+    def compact(self):
+        """Drop tombstones from the postings (document numbers are kept)."""
+        alive = self.alive
+        for term in list(self.postings):
+            docs, frequencies = self.postings[term]
+            keep = [i for i, doc in enumerate(docs) if alive[doc]]
+            if not keep:
+                del self.postings[term]
+            elif len(keep) < len(docs):
+                self.postings[term] = (array("I", (docs[i] for i in keep)), array("H", (frequencies[i] for i in keep)))
+        self.tombstones = 0
+
+    def search(self, query: str, limit: int = 20, offset: int = 0, hcp_id: str = None) -> Tuple[int, List[Tuple[int, float]]]:
+        """Return (number of matches, [(interaction id, score)] for the requested page)."""
+        terms = set(tokenize(query))
+        count = len(self.live)
+        if not terms or not count:
+            return 0, []
+        hcp = None
+        if hcp_id is not None:
+            hcp = self.hcp_codes.get(hcp_id)
+            if hcp is None:
+                return 0, []
+        average_length = self.total_length / count or 1
+        alive, lengths, hcps = self.alive, self.doc_lengths, self.doc_hcps
+        scores = {}
+        for term in terms:
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            docs, frequencies = entry
+            # Document frequency includes tombstones; close enough for ranking
+            frequency = len(docs)
+            idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for doc, tf in zip(docs, frequencies):
+                if not alive[doc] or (hcp is not None and hcps[doc] != hcp):
+                    continue
+                norm = K1 * (1 - B + B * lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+        # Ties go to the newest document
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))[offset:]
+        return len(scores), [(self.doc_ids[doc], score) for doc, score in top]
+
+    def stats(self) -> Dict[str, Any]:
+        postings = sum(len(docs) for docs, _ in self.postings.values())
+        return {
+            "documents": len(self.live),
+            "terms": len(self.postings),
+            "postings": postings,
+            "tombstones": self.tombstones,
+            # Arrays only; the dicts add roughly 100 bytes per term and document
+            "array_bytes": postings * 6 + len(self.doc_ids) * 13,
+        }
+
+
+def document_text(row: Dict[str, Any]) -> str:
+    return " ".join(row[field] for field in SEARCH_FIELDS if row.get(field))
+
+
+class SearchIndex:
+    """The process-wide inverted index and how it is kept in step with MySQL."""
+
+    def __init__(self, enabled: bool = False, refresh: float = 30):
+        self.enabled = enabled
+        self.refresh = refresh
+        self.index = InvertedIndex()
+        self.ready = False
+        self.refreshed_at = 0.0
+        self._watermark = None
+        self._refresh_task = None
+
+    async def _catch_up(self, pool, since=None):
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT NOW()")
+                watermark = (await cursor.fetchone())[0]
+        where, params = ("WHERE updated_at >= %s", [since]) if since else ("", [])
+        order_by = "updated_at, id" if since else "id"
+        async for rows in stream_rows(pool, where, params, order_by, 5000):
+            for row in rows:
+                self.put(row)
+            # Keep the event loop responsive during a long load
+            await asyncio.sleep(0)
+        # Rows changed while scanning have updated_at >= watermark and are read again next time
+        self._watermark = watermark
+        self.refreshed_at = time.time()
+
+    async def warm(self, pool):
+        """Index every interaction; called once at startup."""
+        if not self.enabled:
+            return
+        await self._catch_up(pool)
+        self.ready = True
+
+    def _refresh_if_stale(self, pool):
+        if time.time() - self.refreshed_at < self.refresh:
+            return
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._catch_up(pool, self._watermark))
+
+    def put(self, row: Dict[str, Any]):
+        """Apply an interaction that was just written (needs id, hcp_id and SEARCH_FIELDS)."""
+        if self.enabled:
+            self.index.add(row["id"], row["hcp_id"], document_text(row))
+
+    def remove(self, interaction_id: int):
+        if self.enabled:
+            self.index.remove(interaction_id)
+
+    def search(self, pool, query: str, limit: int, offset: int, hcp_id: str = None) -> Tuple[int, List[Tuple[int, float]]]:
+        self._refresh_if_stale(pool)
+        return self.index.search(query, limit, offset, hcp_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ready": self.ready,
+            "age_seconds": time.time() - self.refreshed_at if self.refreshed_at else None,
+            **self.index.stats(),
+        }
+
+
+async def fulltext_search(pool, columns: Sequence[str], query: str, limit: int, offset: int,
+                          hcp_id: str = None, boolean: bool = False) -> Tuple[int, list]:
+    """Search with MATCH ... AGAINST; returns (number of matches, rows with a trailing score)."""
+    against = f"{MATCH} AGAINST (%s IN {'BOOLEAN' if boolean else 'NATURAL LANGUAGE'} MODE)"
+    where = f"WHERE {against}" + (" AND hcp_id = %s" if hcp_id else "")
+    params = (query, hcp_id) if hcp_id else (query,)
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(f"SELECT COUNT(*) FROM hcp_interactions {where}", params)
+            total = (await cursor.fetchone())[0]
+            if not total or offset >= total:
+                return total, []
+            await cursor.execute(
+                f"SELECT {', '.join(columns)}, {against} AS score FROM hcp_interactions {where}"
+                " ORDER BY score DESC, id DESC LIMIT %s OFFSET %s",
+                (query, *params, limit, offset)
+            )
+            return total, await cursor.fetchall()
+
+
+async def fetch_by_ids(pool, columns: Sequence[str], ids: Sequence[int]) -> Dict[int, tuple]:
+    """Rows for `ids` keyed by id; `columns` must start with id."""
+    if not ids:
+        return {}
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(
+                f"SELECT {', '.join(columns)} FROM hcp_interactions WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                tuple(ids)
+            )
+            return {row[0]: row for row in await cursor.fetchall()}
+
+
+# Process-wide index, created on first use or at startup
+search_index = None
+
+
+def init_search_index() -> SearchIndex:
+    global search_index
+    search_index = SearchIndex(
+        enabled=os.getenv("SEARCH_INDEX", "mysql") == "memory",
+        refresh=float(os.getenv("SEARCH_INDEX_REFRESH", "30")),
+    )
+    return search_index
+
+
+def get_search_index() -> SearchIndex:
+    if search_index is None:
+        init_search_index()
+    return search_index
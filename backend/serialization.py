@@ -0,0 +1,72 @@
+"""Conversion of hcp_interactions rows into API values.
+
+Rows read from the database are trusted: they are converted to JSON-ready
+dicts once, by a converter built per column list, and encoded with orjson
+when it is installed instead of being re-validated by pydantic.
+"""
+import json
+from typing import Any, Callable, Dict, Sequence
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def format_date(value) -> str | None:
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def format_time(value) -> str | None:
+    """Format a MySQL TIME column, which aiomysql returns as a timedelta."""
+    if value is None:
+        return None
+    return f"{value.seconds//3600:02}:{(value.seconds//60)%60:02}:{value.seconds%60:02}"
+
+
+def format_timestamp(value) -> str | None:
+    return value.isoformat() if value else None
+
+
+# Formatter per column; other columns are passed through unchanged
+FORMATTERS = {"date": format_date, "time": format_time, "updated_at": format_timestamp}
+
+
+def row_converter(columns: Sequence[str], names: Dict[str, str] = None) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    """Build a function turning a row tuple into a dict keyed by column name.
+
+    Formatters are looked up once per column list rather than once per row.
+    `names` renames columns in the output (e.g. id -> interaction_id).
+    """
+    keys = tuple((names or {}).get(column, column) for column in columns)
+    formatted = tuple((i, FORMATTERS[column]) for i, column in enumerate(columns) if column in FORMATTERS)
+    if not formatted:
+        return lambda row: dict(zip(keys, row))
+
+    def convert(row: Sequence[Any]) -> Dict[str, Any]:
+        values = list(row)
+        for i, formatter in formatted:
+            values[i] = formatter(values[i])
+        return dict(zip(keys, values))
+    return convert
+
+
+def dumps(value: Any) -> bytes:
+    """Encode already JSON-ready values, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for trusted, pre-converted data: no validation or jsonable_encoder pass."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def sse_event(name: str, data: Any) -> bytes:
+    """One server-sent event with a JSON payload."""
+    return b"event: " + name.encode("utf-8") + b"\ndata: " + dumps(data) + b"\n\n"
@@ -0,0 +1,33 @@
+"""Launch the API with one or more worker processes.
+
+Usage:
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8000]
+
+Each worker is a separate process that builds its own DB pool, LLM client,
+caches and compiled workflow in the lifespan hook, so nothing is shared
+across processes. With DB_MAX_CONNECTIONS set, DB_POOL_MAX is divided
+between the workers so the total stays within MySQL max_connections.
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    total_connections = os.getenv("DB_MAX_CONNECTIONS")
+    if total_connections and "DB_POOL_MAX" not in os.environ:
+        # Workers inherit the environment of this process
+        os.environ["DB_POOL_MAX"] = str(max(1, int(total_connections) // args.workers))
+
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Server-side /chat sessions: form state and message history keyed by session id.
+
+The in-memory store is per process. With several workers, point
+CHAT_SESSION_PATH at a SQLite file so every worker sees the same sessions.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict
+
+# Messages kept per session; older turns are dropped
+MAX_HISTORY = int(os.getenv("CHAT_SESSION_HISTORY", "20"))
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class MemorySessionStore:
+    """LRU of sessions with an idle TTL; the least recently used session is evicted first."""
+
+    def __init__(self, max_sessions: int = 10000, ttl: float = 1800):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get(self, session_id: str) -> Dict[str, Any] | None:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._sessions[session_id]
+            self.expirations += 1
+            return None
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+
+    async def put(self, session_id: str, data: Dict[str, Any]):
+        self._sessions[session_id] = (time.time() + self.ttl, data)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def close(self):
+        self._sessions.clear()
+
+
+class SQLiteSessionStore:
+    """Sessions in a local SQLite file shared by all workers, accessed off the event loop."""
+
+    def __init__(self, path: str, max_sessions: int = 10000, ttl: float = 1800):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_expires ON chat_sessions (expires_at)")
+        self._conn.commit()
+        # Reported by stats(), which runs on the event loop: kept up to date
+        # by this worker's writes and recounted (off the loop) when pruning,
+        # rather than counted on every /metrics scrape
+        self._sessions = self._count()
+
+    def _get(self, session_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM chat_sessions WHERE session_id = ? AND expires_at >= ?", (session_id, time.time())
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def _put(self, session_id: str, data: str):
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM chat_sessions WHERE session_id = ?", (session_id,)).fetchone()
+            self._sessions += not exists
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, data, now + self.ttl)
+            )
+            self._writes += 1
+            # Prune periodically rather than on every write; expires_at orders by last use
+            if self._writes % 100 == 0:
+                self._conn.execute("DELETE FROM chat_sessions WHERE expires_at < ?", (now,))
+                self._conn.execute(
+                    "DELETE FROM chat_sessions WHERE session_id IN ("
+                    "SELECT session_id FROM chat_sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,)
+                )
+                self._sessions = self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+            self._conn.commit()
+
+    def _delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._conn.commit()
+            self._sessions = max(self._sessions - deleted, 0)
+            return deleted > 0
+
+    def _count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+
+    async def get(self, session_id: str) -> Dict[str, Any] | None:
+        return await asyncio.to_thread(self._get, session_id)
+
+    async def put(self, session_id: str, data: Dict[str, Any]):
+        await asyncio.to_thread(self._put, session_id, json.dumps(data))
+
+    async def delete(self, session_id: str) -> bool:
+        return await asyncio.to_thread(self._delete, session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "sessions": self._sessions, "max_sessions": self.max_sessions}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Process-wide session store, created at startup
+sessions = None
+
+
+def init_sessions():
+    global sessions
+    max_sessions = int(os.getenv("CHAT_SESSION_MAX", "10000"))
+    ttl = float(os.getenv("CHAT_SESSION_TTL", "1800"))
+    path = os.getenv("CHAT_SESSION_PATH")
+    if path:
+        sessions = SQLiteSessionStore(path, max_sessions, ttl)
+    else:
+        sessions = MemorySessionStore(max_sessions, ttl)
+    return sessions
+
+
+def get_sessions():
+    if sessions is None:
+        init_sessions()
+    return sessions
+
+
+def close_sessions():
+    global sessions
+    if sessions is not None:
+        sessions.close()
+        sessions = None
@@ -0,0 +1,17 @@
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import DuplicateIndex  # noqa: E402
+
+NOTES = "discussed dosing of cardiox, asked for samples and the full study"
+
+
+def test_dates_match_whatever_their_format():
+    index = DuplicateIndex()
+    index.add(1, "H1", "2025-6-5", NOTES)
+    assert index.find("H1", "2025-06-05", NOTES) == 1
+    assert index.find("H1", date(2025, 6, 5), NOTES) == 1
+    assert index.find("H1", "2025-06-06", NOTES) is None
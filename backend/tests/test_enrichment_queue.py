@@ -0,0 +1,38 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrichment_queue import EnrichmentQueue  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_sweep_runs_periodically_and_requeues():
+    handled = []
+    sweeps = []
+
+    async def handler(interaction_id, notes):
+        handled.append(interaction_id)
+
+    async def sweep():
+        sweeps.append(len(sweeps))
+        if len(sweeps) == 1:
+            raise RuntimeError("database unavailable")
+        if not queue.is_active(7):
+            await queue.submit(7, "notes")
+
+    queue = EnrichmentQueue(handler, workers=1, sweep=sweep, sweep_interval=0.01)
+    queue.start()
+    await asyncio.sleep(0.1)
+    await queue.stop()
+    assert len(sweeps) > 2
+    assert queue.stats()["sweep_errors"] == 1
+    assert 7 in handled
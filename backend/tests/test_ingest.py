@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingest  # noqa: E402
+from test_interactions import FakePool  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_insert_rows_uses_one_statement_per_chunk(monkeypatch):
+    monkeypatch.setattr(ingest, "autoinc_step", None)
+    pool = FakePool()
+    pool.results["SELECT @@auto_increment_increment"] = [(1,)]
+    rows = [tuple(range(len(ingest.INSERT_COLUMNS)))] * 5
+
+    ids = await ingest.insert_rows(pool, rows, chunk_size=3)
+
+    inserts = [sql for sql, _ in pool.statements if sql.startswith("INSERT INTO hcp_interactions")]
+    assert len(inserts) == 2
+    assert ids == [1, 2, 3, 4, 5]
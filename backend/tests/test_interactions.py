@@ -0,0 +1,157 @@
+"""API tests against an in-memory stand-in for the MySQL pool and the stub LLM.
+
+Run from the backend directory: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LLM_BACKEND"] = "stub"
+
+import main  # noqa: E402
+from llm import StubBackend, init_llm  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.lastrowid = None
+        self.rowcount = 0
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        self.pool.statements.append((sql, params))
+        self.rows = []
+        self.rowcount = 1
+        if sql.startswith("INSERT INTO hcp_interactions"):
+            # One id per row of a multi-row INSERT; lastrowid is the first
+            self.rowcount = sql.count("), (") + 1
+            self.lastrowid = self.pool.next_id + 1
+            self.pool.next_id += self.rowcount
+        elif sql.startswith("SELECT id FROM hcp_interactions WHERE id = %s"):
+            self.rows = [(params[0],)]
+        for prefix, rows in self.pool.results.items():
+            if sql.startswith(prefix):
+                self.rows = rows
+
+    async def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def cursor(self, *args):
+        return FakeCursor(self.pool)
+
+    async def begin(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self):
+        self.statements = []
+        self.next_id = 0
+        # Rows returned for statements starting with a given prefix
+        self.results = {}
+
+    def acquire(self):
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def get_hcp(pool, hcp_id):
+        return {"hcp_id": hcp_id, "name": "Dr. Test", "specialty": "Cardiology"}
+
+    monkeypatch.setattr(main, "pool", FakePool())
+    monkeypatch.setattr(main.get_directory(), "get", get_hcp)
+    monkeypatch.delenv("ENRICHMENT_DEFERRED", raising=False)
+    init_llm(StubBackend())
+    return TestClient(main.app)
+
+
+def test_create_interaction_without_optional_fields(client):
+    # No ?defer_enrichment= and no optional fields, as the frontend sends it
+    response = client.post("/interactions", json={"hcp_id": "H1", "topic_discussed": "Discussed dosing"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["id"] == 1
+    assert body["outcome"] in ("interested", "not interested", "follow-up needed")
+
+
+def test_create_interaction_with_defer_enrichment(client):
+    response = client.post("/interactions?defer_enrichment=false", json={"hcp_id": "H1"})
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_apply_enrichment_uses_current_notes(client, monkeypatch):
+    # The queued job carries notes that were edited since; the row's notes win
+    main.pool.results["SELECT topic_discussed FROM hcp_interactions"] = [("asked us to send the study",)]
+    enriched = []
+
+    async def fake_enrich(notes):
+        enriched.append(notes)
+        return {"summary": notes, "outcome": "follow-up needed"}
+
+    monkeypatch.setattr(main, "enrich", fake_enrich)
+    await main.apply_enrichment(1, "old notes")
+    assert enriched == ["asked us to send the study"]
+
+
+@pytest.mark.anyio
+async def test_apply_enrichment_skips_unclaimable_row(client, monkeypatch):
+    async def fake_enrich(notes):
+        raise AssertionError("must not enrich a row that is no longer pending")
+
+    monkeypatch.setattr(main, "enrich", fake_enrich)
+    await main.apply_enrichment(1, "old notes")
+
+
+def test_message_form_keeps_interaction_type_of_earlier_turn():
+    state = main.InteractionState(messages=[{"role": "user", "content": "met dr.smith on a call"}])
+    _, form = main.message_form(state)
+    assert form["interaction_type"] == "call"
+
+    # A later message that doesn't name a type keeps the session's type
+    state = main.InteractionState(messages=[{"role": "user", "content": "discussed dosing"}], **form)
+    _, form = main.message_form(state)
+    assert form["interaction_type"] == "call"
+
+
+def test_message_form_defaults_interaction_type_to_meeting():
+    state = main.InteractionState(messages=[{"role": "user", "content": "met dr.smith, discussed dosing"}])
+    _, form = main.message_form(state)
+    assert form["interaction_type"] == "meeting"
@@ -0,0 +1,52 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_cache import LLMCache, SQLiteTier  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class LockedTier:
+    async def get(self, key):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def set(self, key, value, ttl):
+        raise sqlite3.OperationalError("database is locked")
+
+    def close(self):
+        pass
+
+
+@pytest.mark.anyio
+async def test_persistent_errors_do_not_lose_computed_value():
+    cache = LLMCache(persistent=LockedTier())
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return "interested"
+
+    assert await cache.get_or_compute("key", compute) == "interested"
+    # Served from memory afterwards
+    assert await cache.get_or_compute("key", compute) == "interested"
+    assert len(calls) == 1
+    assert cache.stats()["persistent_errors"] >= 1
+
+
+@pytest.mark.anyio
+async def test_sqlite_tier_uses_wal(tmp_path):
+    tier = SQLiteTier(str(tmp_path / "cache.db"))
+    try:
+        await tier.set("key", "value", 60)
+        assert await tier.get("key") == "value"
+        assert tier._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    finally:
+        tier.close()
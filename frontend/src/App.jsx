@@ -17,9 +17,17 @@ function App() {
 
   const fetchInteractions = async () => {
     try {
-      const response = await fetch('http://localhost:8000/interactions');
-      if (!response.ok) throw new Error(await response.text());
-      const data = await response.json();
+      // The list is paginated: follow X-Next-Cursor until the last page
+      const data = [];
+      let cursor = null;
+      do {
+        const params = new URLSearchParams({ limit: '1000' });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`http://localhost:8000/interactions?${params}`);
+        if (!response.ok) throw new Error(await response.text());
+        data.push(...(await response.json()));
+        cursor = response.headers.get('X-Next-Cursor');
+      } while (cursor);
       dispatch(setInteractions(data));
     } catch (error) {
       console.error('Error fetching interactions:', error);